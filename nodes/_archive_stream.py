@@ -0,0 +1,302 @@
+"""Extract tar and zip archives while they are being downloaded.
+
+The archive is read once, front to back, from a file-like stream and is
+never stored: tar archives (plain, gzip, bzip2 or xz) go through
+``tarfile``'s stream mode, and zip archives through a parser of the local
+file headers. Zip entries whose size is only known after their data (a
+"data descriptor") are still streamed when they are deflated; if an entry
+cannot be streamed at all (stored with a data descriptor, encrypted or
+using another compression method), the rest of the archive is spooled to a
+temporary file and finished with ``zipfile`` through its central directory.
+
+Only regular files and directories are extracted; absolute paths, ``..``
+components and links are skipped. Each file is written next to its target
+and renamed into place once complete.
+"""
+
+import http.client
+import io
+import os
+import shutil
+import struct
+import tarfile
+import tempfile
+import zipfile
+import zlib
+from typing import Callable, List, Optional
+
+ARCHIVE_KINDS = ("none", "auto", "tar", "zip")
+
+_TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+_COPY_BLOCK = 1024 * 1024
+
+_LOCAL_HEADER = b"PK\x03\x04"
+_DESCRIPTOR = b"PK\x07\x08"
+_LOCAL_STRUCT = struct.Struct("<HHHHHIIIHH")  # after the signature
+_FLAG_ENCRYPTED = 0x01
+_FLAG_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+
+class CountingReader(io.RawIOBase):
+    """Readable stream over *readinto* that passes every chunk read to *on_chunk*.
+
+    ``http.client`` errors (e.g. ``IncompleteRead``) are raised as ``IOError``
+    so a broken connection is treated like any other network failure.
+    """
+
+    def __init__(self, readinto: Callable, on_chunk: Callable):
+        self._readinto = readinto
+        self._on_chunk = on_chunk
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        try:
+            count = self._readinto(buffer)
+        except http.client.HTTPException as e:
+            raise IOError(f"Connection broken: {e!r}") from e
+        if count:
+            self._on_chunk(memoryview(buffer)[:count])
+        return count
+
+    def drain(self):
+        """Read (and count) whatever the extractor left unread, e.g. tar padding."""
+        while self.read(_COPY_BLOCK):
+            pass
+
+
+def detect_kind(filename: str, kind: str) -> str:
+    """Resolve ``"auto"`` from the archive *filename*; returns ``"tar"`` or ``"zip"``."""
+    if kind != "auto":
+        return kind
+    lower = filename.lower()
+    if lower.endswith(".zip"):
+        return "zip"
+    if lower.endswith(_TAR_SUFFIXES):
+        return "tar"
+    raise ValueError(f"Cannot tell the archive type of '{filename}'; choose tar or zip")
+
+
+def extract_stream(stream, dest: str, kind: str) -> List[str]:
+    """Extract the archive read from *stream* into *dest*; returns the files written."""
+    if kind == "tar":
+        return _extract_tar(stream, dest)
+    if kind == "zip":
+        return _ZipStreamExtractor(stream, dest).run()
+    raise ValueError(f"Unsupported archive type: {kind}")
+
+
+# -------------------- shared helpers -------------------------
+def _safe_target(dest: str, name: str) -> Optional[str]:
+    """Absolute path for member *name* below *dest*, or None if it escapes it."""
+    name = name.replace("\\", "/")
+    parts = [part for part in name.split("/") if part not in ("", ".")]
+    if not parts or name.startswith("/") or ".." in parts or ":" in parts[0]:
+        return None
+    return os.path.join(dest, *parts)
+
+
+def _write_member(source, target: str, size: Optional[int] = None):
+    """Copy *source* into *target* through a partial file renamed into place."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial = target + ".ocs_part"
+    try:
+        with open(partial, "wb") as fh:
+            if size is None:
+                shutil.copyfileobj(source, fh, _COPY_BLOCK)
+            else:
+                remaining = size
+                while remaining:
+                    block = source.read(min(remaining, _COPY_BLOCK))
+                    if not block:
+                        raise EOFError("Archive ended in the middle of a member")
+                    fh.write(block)
+                    remaining -= len(block)
+    except BaseException:
+        os.remove(partial)
+        raise
+    os.replace(partial, target)
+
+
+# -------------------- tar ------------------------------------
+def _extract_tar(stream, dest: str) -> List[str]:
+    written = []
+    with tarfile.open(fileobj=stream, mode="r|*") as archive:
+        for member in archive:
+            target = _safe_target(dest, member.name)
+            if target is None or not (member.isfile() or member.isdir()):
+                print(f"[OCS_ModelDownloader] Skipping archive member: {member.name}")
+                continue
+            if member.isdir():
+                os.makedirs(target, exist_ok=True)
+                continue
+            _write_member(archive.extractfile(member), target, member.size)
+            written.append(target)
+    return written
+
+
+# -------------------- zip ------------------------------------
+class _PushbackReader:
+    """Exact reads over a stream, with the ability to give bytes back."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._pending = b""
+
+    def read(self, size: int) -> bytes:
+        if self._pending:
+            data, self._pending = self._pending[:size], self._pending[size:]
+            return data
+        return self._stream.read(size)
+
+    def read_exact(self, size: int) -> bytes:
+        parts, remaining = [], size
+        while remaining:
+            data = self.read(remaining)
+            if not data:
+                raise EOFError("Zip archive ended unexpectedly")
+            parts.append(data)
+            remaining -= len(data)
+        return b"".join(parts)
+
+    def unread(self, data: bytes):
+        self._pending = data + self._pending
+
+
+class _ZipStreamExtractor:
+
+    def __init__(self, stream, dest: str):
+        self.reader = _PushbackReader(stream)
+        self.dest = dest
+        self.written: List[str] = []
+        self.done = set()
+
+    def run(self) -> List[str]:
+        while True:
+            signature = self.reader.read_exact(4)
+            if signature != _LOCAL_HEADER:
+                # Central directory (or end record): every entry has been read.
+                return self.written
+            header = self.reader.read_exact(_LOCAL_STRUCT.size)
+            fields = _LOCAL_STRUCT.unpack(header)
+            _, flags, method, _, _, crc, csize, usize, name_len, extra_len = fields
+            raw_name = self.reader.read_exact(name_len)
+            extra = self.reader.read_exact(extra_len)
+            name = raw_name.decode("utf-8" if flags & _FLAG_UTF8 else "cp437")
+            zip64, usize, csize = self._zip64_sizes(extra, usize, csize)
+
+            descriptor = bool(flags & _FLAG_DESCRIPTOR)
+            if flags & _FLAG_ENCRYPTED or method not in (0, 8) or (descriptor and method == 0):
+                self.reader.unread(signature + header + raw_name + extra)
+                return self._finish_spooled()
+
+            target = _safe_target(self.dest, name)
+            if target is None or name.endswith("/"):
+                if target is None:
+                    print(f"[OCS_ModelDownloader] Skipping archive member: {name}")
+                elif not os.path.isdir(target):
+                    os.makedirs(target, exist_ok=True)
+                sink = None
+            else:
+                sink = target
+
+            actual_crc = self._copy_entry(sink, method, csize, descriptor)
+            if descriptor:
+                crc = self._read_descriptor(zip64)
+            if actual_crc != crc:
+                raise zipfile.BadZipFile(f"CRC mismatch in archive member {name}")
+            if sink is not None:
+                self.written.append(sink)
+            self.done.add(name)
+
+    @staticmethod
+    def _zip64_sizes(extra: bytes, usize: int, csize: int):
+        """Read the Zip64 extra field; returns (is_zip64, usize, csize)."""
+        pos = 0
+        while pos + 4 <= len(extra):
+            tag, size = struct.unpack("<HH", extra[pos:pos + 4])
+            if tag == 0x0001:
+                values = extra[pos + 4:pos + 4 + size]
+                offset = 0
+                if usize == 0xFFFFFFFF:
+                    usize = struct.unpack("<Q", values[offset:offset + 8])[0]
+                    offset += 8
+                if csize == 0xFFFFFFFF:
+                    csize = struct.unpack("<Q", values[offset:offset + 8])[0]
+                return True, usize, csize
+            pos += 4 + size
+        return False, usize, csize
+
+    def _copy_entry(self, target: Optional[str], method: int, csize: int, descriptor: bool) -> int:
+        """Write the data of one entry to *target* (None: discard); returns its CRC-32."""
+        crc = 0
+        fh = None
+        if target is not None:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            fh = open(target + ".ocs_part", "wb")
+        try:
+            inflater = zlib.decompressobj(-15) if method == 8 else None
+            remaining = None if descriptor else csize
+            while remaining is None or remaining:
+                block = self.reader.read(_COPY_BLOCK if remaining is None else min(remaining, _COPY_BLOCK))
+                if not block:
+                    raise EOFError("Archive ended in the middle of a member")
+                if remaining is not None:
+                    remaining -= len(block)
+                data = block
+                if inflater is not None:
+                    data = inflater.decompress(block)
+                    if inflater.eof:
+                        # With a data descriptor the deflate stream marks the end.
+                        self.reader.unread(inflater.unused_data)
+                        if remaining:
+                            raise zipfile.BadZipFile("Compressed size does not match the deflate stream")
+                        remaining = 0
+                crc = zlib.crc32(data, crc)
+                if fh is not None:
+                    fh.write(data)
+        except BaseException:
+            if fh is not None:
+                fh.close()
+                os.remove(target + ".ocs_part")
+            raise
+        if fh is not None:
+            fh.close()
+            os.replace(target + ".ocs_part", target)
+        return crc & 0xFFFFFFFF
+
+    def _read_descriptor(self, zip64: bool) -> int:
+        first = self.reader.read_exact(4)
+        if first == _DESCRIPTOR:
+            first = self.reader.read_exact(4)
+        self.reader.read_exact(16 if zip64 else 8)
+        return struct.unpack("<I", first)[0]
+
+    def _finish_spooled(self) -> List[str]:
+        """Spool the rest of the archive to disk and extract it through the central directory.
+
+        The spooled tail lacks the entries already extracted; ``zipfile``
+        accounts for the missing prefix the same way it handles data
+        prepended to an archive.
+        """
+        print("[OCS_ModelDownloader] Zip entry cannot be streamed, spooling the rest of the archive")
+        with tempfile.TemporaryFile(dir=self.dest) as spool:
+            shutil.copyfileobj(self.reader, spool, _COPY_BLOCK)
+            spool.seek(0)
+            with zipfile.ZipFile(spool) as archive:
+                for info in archive.infolist():
+                    if info.filename in self.done or info.header_offset < 0:
+                        continue
+                    target = _safe_target(self.dest, info.filename)
+                    if target is None:
+                        print(f"[OCS_ModelDownloader] Skipping archive member: {info.filename}")
+                        continue
+                    if info.is_dir():
+                        os.makedirs(target, exist_ok=True)
+                        continue
+                    with archive.open(info) as source:
+                        _write_member(source, target)
+                    self.written.append(target)
+        return self.written
@@ -0,0 +1,121 @@
+"""Content-addressed store of the files fetched by the OCS Model Downloader.
+
+Every blob is kept once, named after its SHA256::
+
+    <root>/sha256/ab/ab12...ef
+    <root>/urls/9c/9c41...07      (text file holding the blob's SHA256)
+
+The ``urls`` entries map ``sha256(url + ETag)`` to a blob, so a model can be
+found again by URL alone when no expected hash is given; a changed ETag on
+the server simply misses the cache.
+
+A requested ``folder/filename`` is materialized from the store as a hardlink
+when both live on the same filesystem, as a reflink (copy-on-write clone) on
+filesystems that support it, and as a plain copy otherwise.
+"""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_FICLONE = 0x40049409  # Linux ioctl: clone the extents of one file into another
+
+
+def _reflink(src: str, dst: str):
+    if fcntl is None:
+        raise OSError("reflinks are not supported on this platform")
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.remove(dst)
+            raise
+
+
+def place(src: str, dst: str, copy: bool = True) -> str:
+    """Make *dst* hold the contents of *src* as cheaply as possible.
+
+    *dst* is written next to itself and moved into place, so an existing
+    file is replaced atomically. Returns ``"hardlink"``, ``"reflink"`` or
+    ``"copy"``; with *copy* False, raises ``OSError`` instead of copying.
+    """
+    tmp = f"{dst}.ocs_link"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(src, tmp)
+        method = "hardlink"
+    except OSError:
+        try:
+            _reflink(src, tmp)
+            method = "reflink"
+        except OSError:
+            if not copy:
+                raise
+            shutil.copyfile(src, tmp)
+            method = "copy"
+    os.replace(tmp, dst)
+    return method
+
+
+class BlobStore:
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    @staticmethod
+    def url_key(url: str, etag: str) -> str:
+        return hashlib.sha256(f"{url}\n{etag}".encode("utf-8")).hexdigest()
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.root / "sha256" / sha256[:2] / sha256
+
+    def _url_path(self, key: str) -> Path:
+        return self.root / "urls" / key[:2] / key
+
+    def lookup(self, sha256: str = "", url_key: str = "") -> Optional[Path]:
+        """Path of the blob with *sha256*, or of the one recorded for *url_key*."""
+        if not sha256 and url_key:
+            try:
+                sha256 = self._url_path(url_key).read_text(encoding="utf-8").strip()
+            except OSError:
+                return None
+        if not sha256:
+            return None
+        path = self._blob_path(sha256)
+        return path if path.is_file() else None
+
+    def add(self, path: str, sha256: str, url_key: str = "") -> Optional[str]:
+        """Store the file at *path* under *sha256*.
+
+        When that blob already exists (the same content fetched from a mirror
+        or under a new ETag), *path* is replaced by a link to it instead, so
+        the content is kept on disk once. Returns how *path* and the blob
+        were linked, or None when they were not (already the same file, or
+        no link is possible and a second copy would gain nothing).
+        """
+        blob = self._blob_path(sha256)
+        method = None
+        if not blob.is_file():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            method = place(path, str(blob))
+        elif not os.path.samefile(blob, path):
+            try:
+                method = place(str(blob), path, copy=False)
+            except OSError:
+                pass
+        if url_key:
+            ref = self._url_path(url_key)
+            ref.parent.mkdir(parents=True, exist_ok=True)
+            tmp = ref.with_name(ref.name + ".tmp")
+            tmp.write_text(sha256, encoding="utf-8")
+            os.replace(tmp, ref)
+        return method
@@ -0,0 +1,118 @@
+"""Grid layout shared by the OCS image grid nodes.
+
+The layout (cell size, gutters, output size) is computed once from the
+tiles, the output batch is allocated once, and every tile is copied
+straight into its place; no intermediate row tensors are built.
+"""
+
+from typing import List, Sequence, Tuple
+
+import torch
+
+
+def _fill(out: torch.Tensor, background: Sequence[float]):
+    channels = out.shape[-1]
+    color = list(background[:channels]) + [1.0] * (channels - len(background))
+    out[:] = torch.tensor(color[:channels], device=out.device, dtype=out.dtype)
+
+
+def _copy_tile(target: torch.Tensor, tile: torch.Tensor):
+    """Copy *tile* into the same-sized *target*; missing channels (RGB into RGBA) are set to opaque."""
+    shared = min(tile.shape[-1], target.shape[-1])
+    target[..., :shared] = tile[..., :shared]
+    if shared < target.shape[-1]:
+        target[..., shared:] = 1.0
+
+
+def parse_color(text: str) -> Tuple[float, ...]:
+    """Parse ``#RRGGBB``/``#RRGGBBAA`` or ``r, g, b[, a]`` (0-255) into 0-1 floats."""
+    text = (text or "").strip()
+    if text.startswith("#"):
+        digits = text[1:]
+        if len(digits) not in (6, 8):
+            raise ValueError(f"Invalid colour: {text}")
+        values = [int(digits[i:i + 2], 16) for i in range(0, len(digits), 2)]
+    else:
+        values = [int(float(part)) for part in text.split(",")]
+        if len(values) not in (3, 4):
+            raise ValueError(f"Invalid colour: {text}")
+    return tuple(max(0, min(255, value)) / 255.0 for value in values)
+
+
+class GridLayout:
+    """Placement of ``rows x columns`` cells of ``cell_h x cell_w`` pixels, *gutter* apart."""
+
+    def __init__(self, rows: int, columns: int, cell_h: int, cell_w: int, gutter: int = 0):
+        self.rows = rows
+        self.columns = columns
+        self.cell_h = cell_h
+        self.cell_w = cell_w
+        self.gutter = gutter
+        self.height = rows * cell_h + (rows - 1) * gutter
+        self.width = columns * cell_w + (columns - 1) * gutter
+
+    @classmethod
+    def fit(cls, sizes: Sequence[Tuple[int, int]], rows: int, columns: int, gutter: int = 0):
+        """Layout whose cells fit the largest of the ``(height, width)`` *sizes*."""
+        cell_h = max(height for height, _ in sizes)
+        cell_w = max(width for _, width in sizes)
+        return cls(rows, columns, cell_h, cell_w, gutter)
+
+    def cell(self, index: int, height: int, width: int) -> Tuple[int, int]:
+        """Top-left ``(y, x)`` of a *height* x *width* tile centred in cell *index* (row-major)."""
+        row, column = divmod(index, self.columns)
+        y = row * (self.cell_h + self.gutter) + (self.cell_h - height) // 2
+        x = column * (self.cell_w + self.gutter) + (self.cell_w - width) // 2
+        return y, x
+
+    def allocate(self, batch: int, channels: int, background: Sequence[float], filled: int,
+                 exact: bool, device=None, dtype=torch.float32) -> torch.Tensor:
+        """Output batch, painted with *background* only if the tiles will not cover it.
+
+        *filled* is the number of cells used on the last grid; *exact* means
+        every tile has the full cell size.
+        """
+        out = torch.empty((batch, self.height, self.width, channels), device=device, dtype=dtype)
+        if not exact or self.gutter or filled < self.rows * self.columns:
+            _fill(out, background)
+        return out
+
+    def paste(self, out: torch.Tensor, index: int, tile: torch.Tensor):
+        """Copy the ``[..., H, W, C]`` *tile* into cell *index* of *out* (``[..., H, W, C]``).
+
+        Missing channels (an RGB tile in an RGBA grid) are set to opaque.
+        """
+        height, width = tile.shape[-3:-1]
+        y, x = self.cell(index, height, width)
+        _copy_tile(out[..., y:y + height, x:x + width, :], tile)
+
+
+def compose_rows(rows: List[List[torch.Tensor]], background: Sequence[float] = (0.0, 0.0, 0.0)) -> torch.Tensor:
+    """Pack rows of ``[B, H, W, C]`` tiles into one batch, as ``torch.cat`` of the rows would.
+
+    Tiles are placed left to right at their own width, and each row is as
+    high as its tallest tile. For tiles ``torch.cat`` accepts (equal heights
+    within a row, equal row widths) the result is the same; otherwise the
+    gaps are filled with *background*.
+    """
+    tiles = [tile for row in rows for tile in row]
+    heights = [max(tile.shape[1] for tile in row) for row in rows]
+    widths = [sum(tile.shape[2] for tile in row) for row in rows]
+    out = torch.empty(
+        (max(tile.shape[0] for tile in tiles), sum(heights), max(widths), max(tile.shape[3] for tile in tiles)),
+        device=tiles[0].device, dtype=tiles[0].dtype,
+    )
+    packed = len(set(widths)) == 1 and all(
+        tile.shape[1] == height for row, height in zip(rows, heights) for tile in row
+    )
+    if not packed:
+        _fill(out, background)
+
+    y = 0
+    for row, height in zip(rows, heights):
+        x = 0
+        for tile in row:
+            _copy_tile(out[:, y:y + tile.shape[1], x:x + tile.shape[2], :], tile)
+            x += tile.shape[2]
+        y += height
+    return out
@@ -0,0 +1,157 @@
+"""Persistent index of the files written by the OCS Image Saver.
+
+Every output root gets an append-only ``.ocs_index.jsonl`` file with one JSON
+record per saved image::
+
+    {"counter": 12, "seed": 7, "path": "2025-01-31/7_00012.png", "time": 1738281600.0}
+
+``path`` is relative to the output root. Images saved with deduplication
+enabled also carry a ``"hash"`` of their pixels and encoder settings, and
+the ``"size"`` and ``"mtime_ns"`` of the file as written.
+
+The file is read once per process; afterwards the next counter, the
+seed/hash lookup tables and the set of folders this process has created are
+served from memory, so saving never has to list the output directory.
+Downstream tools can read the JSONL directly or use
+``OutputIndex.lookup_seed``.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+INDEX_FILENAME = ".ocs_index.jsonl"
+
+
+class OutputIndex:
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.path = self.root / INDEX_FILENAME
+        self._lock = threading.Lock()
+        self._next_counter: Optional[int] = None
+        self._folders = set()
+        self._by_seed: Dict[int, List[dict]] = {}
+        self._by_hash: Dict[str, List[dict]] = {}
+        self._load()
+
+    # -------------------- loading --------------------------
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn last line from an interrupted write; skip it.
+                        continue
+                    self._remember(record)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[OCS_ImageSaver] Cannot read output index '{self.path}': {e}")
+
+    def _remember(self, record: dict):
+        counter = record.get("counter")
+        if isinstance(counter, int):
+            if self._next_counter is None or counter >= self._next_counter:
+                self._next_counter = counter + 1
+        self._by_seed.setdefault(record.get("seed"), []).append(record)
+        if record.get("hash"):
+            self._by_hash.setdefault(record["hash"], []).append(record)
+
+    # -------------------- public API -----------------------
+    def reserve(self, count: int, fallback: Callable[[], int]) -> int:
+        """Return the first of *count* consecutive counters.
+
+        *fallback* is only called when the index is empty, to seed the
+        counter from a one-off directory scan.
+        """
+        with self._lock:
+            if self._next_counter is None:
+                self._next_counter = fallback()
+            first = self._next_counter
+            self._next_counter += count
+            return first
+
+    def ensure_folder(self, folder: Path):
+        """Create *folder* unless this process has already created it.
+
+        Folders named in the persisted index are not trusted: they may have
+        been deleted since.
+        """
+        folder = Path(folder)
+        if folder in self._folders:
+            return
+        folder.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._folders.add(folder)
+
+    def record(self, entries: List[dict]):
+        """Append *entries* (``counter``, ``seed`` and absolute ``path``)."""
+        if not entries:
+            return
+        now = time.time()
+        records = []
+        for entry in entries:
+            record = dict(entry)
+            if record.get("hash"):
+                # Lets ``lookup_hash`` tell whether the file was replaced since.
+                try:
+                    st = os.stat(entry["path"])
+                except OSError:
+                    continue
+                record["size"] = st.st_size
+                record["mtime_ns"] = st.st_mtime_ns
+            records.append(record)
+        lines = []
+        with self._lock:
+            for record in records:
+                record["path"] = Path(os.path.relpath(record["path"], self.root)).as_posix()
+                record.setdefault("time", now)
+                self._remember(record)
+                lines.append(json.dumps(record) + "\n")
+            try:
+                with open(self.path, "a", encoding="utf-8") as fh:
+                    fh.writelines(lines)
+            except Exception as e:
+                print(f"[OCS_ImageSaver] Cannot update output index '{self.path}': {e}")
+
+    def lookup_seed(self, seed: int) -> List[dict]:
+        """Records of every image saved with *seed*, oldest first."""
+        with self._lock:
+            return list(self._by_seed.get(seed, ()))
+
+    def lookup_hash(self, digest: str) -> Optional[dict]:
+        """Record of the latest image saved with content hash *digest*, if any.
+
+        Only files that still have the size and modification time they were
+        indexed with, i.e. still hold those pixels, qualify.
+        """
+        with self._lock:
+            records = list(self._by_hash.get(digest, ()))
+        for record in reversed(records):
+            try:
+                st = os.stat(self.root / record["path"])
+            except OSError:
+                continue
+            if st.st_size == record.get("size") and st.st_mtime_ns == record.get("mtime_ns"):
+                return record
+        return None
+
+
+_indexes: Dict[str, OutputIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_output_index(root) -> OutputIndex:
+    """Shared ``OutputIndex`` for the output root *root*."""
+    key = os.path.realpath(root)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = OutputIndex(Path(root))
+        return index
@@ -0,0 +1,131 @@
+"""Rolling tar shards for dataset-scale output of the OCS Image Saver.
+
+Images are appended to uncompressed ``ocs_shard-00000.tar`` files in the
+target folder. A new shard starts once the current one reaches the
+configured size, and shards stay open across executions. Every member is
+also recorded in the sidecar ``ocs_shards.jsonl``::
+
+    {"name": "7_00012.png", "seed": 7, "counter": 12, "shard": "ocs_shard-00003.tar",
+     "offset": 1049088, "size": 1843921, "time": 1738281600.0}
+
+``offset`` and ``size`` locate the raw file bytes inside the shard, so a
+single image can be read back with one seek (see ``read_member``) without
+extracting anything.
+"""
+
+import atexit
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+SHARD_PREFIX = "ocs_shard-"
+INDEX_FILENAME = "ocs_shards.jsonl"
+
+
+class ShardWriter:
+
+    def __init__(self, folder: Path, max_bytes: int):
+        self.folder = Path(folder)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._tar = None
+        self._fh = None
+        self._shard_name = None
+        self._index = None
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+        # Never append to shards of a previous process: they may lack their
+        # end-of-archive marker. One listing per folder and process.
+        existing = [
+            int(name[len(SHARD_PREFIX):-4])
+            for name in os.listdir(self.folder)
+            if name.startswith(SHARD_PREFIX) and name.endswith(".tar")
+            and name[len(SHARD_PREFIX):-4].isdigit()
+        ]
+        self._next_shard = max(existing) + 1 if existing else 0
+
+    def _roll(self):
+        self._close_shard()
+        self._shard_name = f"{SHARD_PREFIX}{self._next_shard:05}.tar"
+        self._next_shard += 1
+        self._fh = open(self.folder / self._shard_name, "wb", buffering=1 << 20)
+        self._tar = tarfile.open(fileobj=self._fh, mode="w", format=tarfile.PAX_FORMAT)
+
+    def _close_shard(self):
+        if self._tar is not None:
+            self._tar.close()
+            self._fh.close()
+            self._tar = self._fh = None
+
+    def add(self, name: str, data: bytes, record: dict) -> dict:
+        """Append *data* as member *name* and index it together with *record*."""
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+
+        with self._lock:
+            if self._tar is None or self._tar.offset >= self.max_bytes:
+                self._roll()
+            self._tar.addfile(info, io.BytesIO(data))
+            # addfile leaves the archive offset right after the padded data.
+            padded = -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+            entry = dict(
+                record,
+                name=name,
+                shard=self._shard_name,
+                offset=self._tar.offset - padded,
+                size=info.size,
+                time=time.time(),
+            )
+            if self._index is None:
+                self._index = open(self.folder / INDEX_FILENAME, "a", encoding="utf-8")
+            self._index.write(json.dumps(entry) + "\n")
+        return entry
+
+    def flush(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+            if self._index is not None:
+                self._index.flush()
+
+    def close(self):
+        with self._lock:
+            self._close_shard()
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+
+def read_member(folder, entry: dict) -> bytes:
+    """Raw bytes of the image described by the index *entry*."""
+    with open(Path(folder) / entry["shard"], "rb") as fh:
+        fh.seek(entry["offset"])
+        return fh.read(entry["size"])
+
+
+_writers: Dict[str, ShardWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_shard_writer(folder, max_bytes: int) -> ShardWriter:
+    """Shared ``ShardWriter`` for *folder*; *max_bytes* applies from the next roll."""
+    key = os.path.realpath(folder)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = ShardWriter(Path(folder), max_bytes)
+        writer.max_bytes = max_bytes
+        return writer
+
+
+@atexit.register
+def _close_writers():
+    with _writers_lock:
+        for writer in _writers.values():
+            writer.close()
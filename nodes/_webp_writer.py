@@ -0,0 +1,87 @@
+"""Streaming animated WebP writer used by the OCS Image Saver.
+
+PIL can only build an animation from a list of fully materialized frames.
+Here every frame is encoded on its own as a still WebP through PIL, its
+bitstream chunks (``ALPH``/``VP8 ``/``VP8L``) are wrapped in an ``ANMF``
+chunk and appended to the output straight away; the RIFF size is patched
+in at the end. Memory therefore stays at one encoded frame regardless of
+the number of frames.
+"""
+
+import io
+import struct
+
+import numpy as np
+from PIL import Image
+
+_FRAME_CHUNKS = {b"ALPH", b"VP8 ", b"VP8L"}
+
+
+def _u24(value: int) -> bytes:
+    return struct.pack("<I", value)[:3]
+
+
+def _chunk(fourcc: bytes, payload: bytes) -> bytes:
+    data = fourcc + struct.pack("<I", len(payload)) + payload
+    return data + b"\x00" if len(payload) % 2 else data
+
+
+def _bitstream_chunks(still: bytes):
+    """Yield the raw image chunks of a still WebP file produced by PIL."""
+    if still[:4] != b"RIFF" or still[8:12] != b"WEBP":
+        raise ValueError("PIL did not produce a WebP stream")
+    pos = 12
+    while pos + 8 <= len(still):
+        fourcc = still[pos:pos + 4]
+        size = struct.unpack("<I", still[pos + 4:pos + 8])[0]
+        end = pos + 8 + size + (size & 1)
+        if fourcc in _FRAME_CHUNKS:
+            yield still[pos:end]
+        pos = end
+
+
+def write_animated_webp(fp, frames: np.ndarray, duration: int, loop: int = 0,
+                        lossless: bool = True, quality: int = 100, method: int = 4,
+                        exif: bytes = None):
+    """Write the ``(N, H, W, C)`` uint8 *frames* as an animated WebP to *fp*.
+
+    *fp* is a path or a seekable binary file. *exif* (e.g. the workflow) is
+    stored once for the whole animation.
+    """
+    count, height, width, channels = frames.shape
+    has_alpha = channels == 4
+    flags = 0x02 | (0x10 if has_alpha else 0) | (0x08 if exif else 0)
+    duration = max(0, min(int(duration), 0xFFFFFF))
+
+    fh = fp if hasattr(fp, "write") else open(fp, "w+b")
+    try:
+        start = fh.tell()
+        fh.write(b"RIFF\x00\x00\x00\x00WEBP")
+        fh.write(_chunk(b"VP8X", bytes([flags, 0, 0, 0]) + _u24(width - 1) + _u24(height - 1)))
+        fh.write(_chunk(b"ANIM", b"\x00\x00\x00\x00" + struct.pack("<H", loop)))
+
+        for index in range(count):
+            buffer = io.BytesIO()
+            Image.fromarray(np.ascontiguousarray(frames[index])).save(
+                buffer, "WEBP", lossless=lossless, quality=quality, method=method
+            )
+            header = (
+                _u24(0) + _u24(0)
+                + _u24(width - 1) + _u24(height - 1)
+                + _u24(duration)
+                + b"\x02"  # no blending: every frame covers the whole canvas
+            )
+            fh.write(_chunk(b"ANMF", header + b"".join(_bitstream_chunks(buffer.getvalue()))))
+
+        if exif:
+            if exif.startswith(b"Exif\x00\x00"):
+                exif = exif[6:]
+            fh.write(_chunk(b"EXIF", exif))
+
+        end = fh.tell()
+        fh.seek(start + 4)
+        fh.write(struct.pack("<I", end - start - 8))
+        fh.seek(end)
+    finally:
+        if fh is not fp:
+            fh.close()
@@ -0,0 +1,82 @@
+import math
+
+from ._image_grid import GridLayout, parse_color
+
+
+class OCS_ImageGrid:
+    """
+    Arranges an IMAGE batch (or list of batches) into a rows x columns grid.
+
+    - Every frame fills one cell, row by row; cells fit the largest frame and
+      smaller frames are centred on the background colour.
+    - More frames than cells produce further pages, returned as a batch.
+    - The layout is computed once and every frame is copied straight into
+      a single preallocated output batch.
+    """
+
+    INPUT_IS_LIST = True
+    RETURN_TYPES = ("IMAGE",)
+    FUNCTION = "compositegrid"
+    CATEGORY = "OCS Nodes"
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "images": ("IMAGE",),
+                "rows": ("INT", {"default": 4, "min": 1, "max": 64}),
+                "columns": ("INT", {"default": 4, "min": 1, "max": 64}),
+            },
+            "optional": {
+                "gutter": (
+                    "INT",
+                    {
+                        "default": 0,
+                        "min": 0,
+                        "max": 512,
+                        "tooltip": "Space in pixels between cells.",
+                    },
+                ),
+                "background": (
+                    "STRING",
+                    {
+                        "default": "#000000",
+                        "multiline": False,
+                        "tooltip": "Colour of the gutters, empty cells and the margins around smaller images: #RRGGBB[AA] or r, g, b[, a].",
+                    },
+                ),
+            },
+        }
+
+    def compositegrid(self, images, rows, columns, gutter=None, background=None):
+        # INPUT_IS_LIST wraps every widget value in a list
+        rows, columns = rows[0], columns[0]
+        gutter = gutter[0] if gutter else 0
+        background = parse_color(background[0] if background else "#000000")
+
+        # Views of every frame, in order; nothing is copied yet.
+        frames = [frame for batch in images for frame in batch]
+        if not frames:
+            raise ValueError("OCS_ImageGrid needs at least one image")
+
+        per_page = rows * columns
+        pages = math.ceil(len(frames) / per_page)
+        layout = GridLayout.fit([frame.shape[:2] for frame in frames], rows, columns, gutter)
+        exact = all(tuple(frame.shape[:2]) == (layout.cell_h, layout.cell_w) for frame in frames)
+        out = layout.allocate(
+            pages, max(frame.shape[2] for frame in frames), background,
+            len(frames) - (pages - 1) * per_page, exact, frames[0].device, frames[0].dtype,
+        )
+        for index, frame in enumerate(frames):
+            page, cell = divmod(index, per_page)
+            layout.paste(out[page], cell, frame)
+        return (out,)
+
+
+NODE_CLASS_MAPPINGS = {
+    "OCS_ImageGrid": OCS_ImageGrid,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "OCS_ImageGrid": "Image Grid",
+}
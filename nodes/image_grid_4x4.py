@@ -1,4 +1,4 @@
-import torch
+from ._image_grid import compose_rows
 
 
 class OCS_ImageGrid4x4:
@@ -49,11 +49,12 @@ Concatenates the 16 input images into a 4x4 grid.
         image_r4c3,
         image_r4c4,
     ):
-        top_row = torch.cat((image_r1c1, image_r1c2, image_r1c3, image_r1c4), dim=2)
-        second_row = torch.cat((image_r2c1, image_r2c2, image_r2c3, image_r2c4), dim=2)
-        third_row = torch.cat((image_r3c1, image_r3c2, image_r3c3, image_r3c4), dim=2)
-        bottom_row = torch.cat((image_r4c1, image_r4c2, image_r4c3, image_r4c4), dim=2)
-        grid = torch.cat((top_row, second_row, third_row, bottom_row), dim=1)
+        grid = compose_rows([
+            [image_r1c1, image_r1c2, image_r1c3, image_r1c4],
+            [image_r2c1, image_r2c2, image_r2c3, image_r2c4],
+            [image_r3c1, image_r3c2, image_r3c3, image_r3c4],
+            [image_r4c1, image_r4c2, image_r4c3, image_r4c4],
+        ])
         return (grid,)
 
 
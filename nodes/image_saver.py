@@ -1,15 +1,273 @@
 from ..helpers import any, _get_kw
 import torch
 
+import atexit
+import contextlib
+import functools
+import hashlib
+import io
 import json
 import os, sys
+import shutil
+import threading
+import time
+import tracemalloc
+import uuid
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 from datetime import datetime
 import folder_paths
 from PIL import Image, PngImagePlugin
 import piexif
 
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+from ._output_index import get_output_index
+from ._png_encoder import PNG_PROFILES, write_apng, write_png
+from ._shard_writer import get_shard_writer
+from ._webp_writer import write_animated_webp
+
+try:
+    import xxhash  # optional, faster than blake2b for multi-megabyte frames
+
+    def _pixel_digest(frame: np.ndarray) -> str:
+        return xxhash.xxh3_128_hexdigest(frame)
+except ImportError:
+    def _pixel_digest(frame: np.ndarray) -> str:
+        return hashlib.blake2b(frame, digest_size=16).hexdigest()
+
+
+# Background writer sizing: a few encoder threads, and a bounded number of
+# frames in flight so a fast producer cannot queue unbounded host memory.
+_ASYNC_WORKERS = max(1, min(8, os.cpu_count() or 1))
+_ASYNC_MAX_PENDING = _ASYNC_WORKERS * 4
+
+# encoder_profile -> WebP ``method`` (speed/size trade-off, 0 fastest, 6 smallest)
+_WEBP_METHODS = {"fast": 0, "balanced": 4, "archival": 6}
+
+# Longest edge of the WebP previews shown in the UI when low_res_preview is on.
+_PREVIEW_SIZE = 512
+_PREVIEW_SUBFOLDER = "ocs_previews"
+
+# Size of the float temporary used while quantizing a batch to uint8.
+_QUANTIZE_SLAB_BYTES = 16 * 1024 * 1024
+
+# Animated formats save the whole batch as one file: format -> extension.
+_ANIMATED_FORMATS = {"apng": "png", "animated_webp": "webp"}
+
+# profile_save only traces Python allocations when asked to: tracemalloc
+# slows every allocation down (and thereby the stage times it would report).
+TRACE_MEMORY = os.environ.get("OCS_SAVE_TRACEMALLOC", "") not in ("", "0")
+
+# Batches still tracing; tracemalloc is stopped when the last one finishes,
+# unless something else had started it.
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+
+def _acquire_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0:
+            _tracing_owned = not tracemalloc.is_tracing()
+            if _tracing_owned:
+                tracemalloc.start()
+        tracemalloc.reset_peak()
+        _tracing_users += 1
+
+
+def _release_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+
+
+class _SaveWriter:
+    """Bounded thread pool that encodes and writes frames off the execution thread.
+
+    ``submit`` blocks once ``max_pending`` frames are queued (back-pressure),
+    ``flush`` waits until everything submitted so far is on disk.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="OCS_ImageSaver"
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+        self._slots.release()
+
+    def flush(self, timeout=None):
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending, timeout=timeout)
+
+    def shutdown(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> _SaveWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _SaveWriter(_ASYNC_WORKERS, _ASYNC_MAX_PENDING)
+        return _writer
+
+
+@atexit.register
+def _drain_writer():
+    """Make sure queued frames reach the disk before the interpreter exits."""
+    if _writer is not None:
+        _writer.shutdown()
+
+
+def _max_rss() -> int:
+    """Lifetime peak resident size of the process in bytes (0 where unavailable)."""
+    if resource is None:
+        return 0
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class _SaveStats:
+    """Per-batch timings, byte counts and memory figures for ``profile_save``.
+
+    Stage times are summed across images (and across worker threads in
+    async mode). The report is logged as one JSON line once the last
+    queued image of the batch has been written.
+
+    ``max_rss_bytes`` is the peak resident size of the whole process over
+    its lifetime, and ``max_rss_growth_bytes`` how far this batch raised
+    it (0 when the batch stayed below an earlier peak). Neither is the
+    batch's own peak: that needs ``OCS_SAVE_TRACEMALLOC=1``, which adds
+    ``peak_traced_bytes``, the batch's peak of memory allocated through
+    Python's allocators (numpy arrays included, torch tensors and PIL's
+    image buffers not).
+    """
+
+    def __init__(self, image_format: str, images: int, async_save: bool):
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.info = {"format": image_format, "images": images, "async": async_save}
+        self.bytes_written = 0
+        self.linked = 0
+        self._pending = 0
+        self._start_rss = _max_rss()
+        self._traces = TRACE_MEMORY
+        if self._traces:
+            _acquire_tracing()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def add_bytes(self, count: int):
+        with self._lock:
+            self.bytes_written += count
+
+    def track(self, futures):
+        """Log the final report once every future of the batch is done."""
+        with self._lock:
+            self._pending += len(futures)
+        for future in futures:
+            future.add_done_callback(self._on_done)
+
+    def _on_done(self, future):
+        with self._lock:
+            self._pending -= 1
+            last = self._pending == 0
+        if last:
+            self.finish()
+
+    def report(self) -> dict:
+        with self._lock:
+            report = dict(self.info)
+            report["wall_ms"] = round((time.perf_counter() - self._start) * 1000.0, 3)
+            report["stages_ms"] = {k: round(v * 1000.0, 3) for k, v in self.stages.items()}
+            report["bytes_written"] = self.bytes_written
+            report["linked"] = self.linked
+            report["pending"] = self._pending
+        if self._traces and tracemalloc.is_tracing():
+            report["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+        if resource is not None:
+            max_rss = _max_rss()
+            report["max_rss_bytes"] = max_rss
+            report["max_rss_growth_bytes"] = max_rss - self._start_rss
+        return report
+
+    def finish(self):
+        print(f"[OCS_ImageSaver] Stats: {json.dumps(self.report())}")
+        if self._traces:
+            self._traces = False
+            _release_tracing()
+
+
+def _stage(stats, name: str):
+    return stats.stage(name) if stats is not None else contextlib.nullcontext()
+
+
+def _when_done(futures, callback):
+    """Call *callback* once every one of *futures* is done (right away if there are none)."""
+    if not futures:
+        callback()
+        return
+    lock = threading.Lock()
+    remaining = [len(futures)]
+
+    def on_done(_):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            callback()
+
+    for future in futures:
+        future.add_done_callback(on_done)
+
+
+def _succeeded(result) -> bool:
+    """Whether a ``_write_frame`` result (a bool, or a future of one) reports a written file."""
+    if isinstance(result, bool):
+        return result
+    return result.exception() is None and bool(result.result())
+
 
 class OCS_ImageSaver:
 
@@ -39,12 +297,22 @@ class OCS_ImageSaver:
                         "max": 0xFFFFFFFFFFFFFFFF,
                     },
                 ),
-                "image_format": (["png", "jpg", "jpeg", "webp"],),
+                "image_format": (["png", "jpg", "jpeg", "webp", "apng", "animated_webp"], {
+                    "tooltip": "'apng' and 'animated_webp' write the whole batch as a single animation, streaming one frame at a time."
+                    }),
                 "lossless_webp": ("BOOLEAN", {"default": True}),
+                "encoder_profile": (["default", "fast", "balanced", "archival"], {
+                    "tooltip": "PNG: 'fast', 'balanced' and 'archival' compress on all CPU cores with increasing zlib effort; 'default' uses the standard single-threaded encoder. WebP: sets the encoder method (0, 4, 6)."
+                    }),
                 "jpg_webp_quality": (
                     "INT",
                     {"default": 100, "min": 1, "max": 100},
                 ),
+                "frame_rate": ("FLOAT", {"default": 24.0, "min": 0.01, "max": 1000.0, "step": 0.01}),
+                "loop_count": ("INT", {
+                    "default": 0, "min": 0, "max": 65535,
+                    "tooltip": "How many times animations play. 0 loops forever."
+                    }),
                 "date_format": ("STRING", {"default": "%Y-%m-%d", "multiline": False}),
                 "time_format": ("STRING", {"default": "%H%M%S", "multiline": False}),
                 "EXIF_UserComment": ("STRING", {"default": "", "multiline": True}),
@@ -52,14 +320,46 @@ class OCS_ImageSaver:
                     "default": True,
                     "tooltip": "Embeds the complete workflow data into the image metadata. Only works with PNG and WebP formats."
                     }),
+                "embed_prompt": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Also embeds the API-format prompt next to the workflow. Only works with the PNG format."
+                    }),
+                "async_save": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Encodes and writes the images on background threads and returns the filenames immediately, so the next prompt can start while the batch is still being written. The UI then shows small previews of the images still being written."
+                    }),
+                "use_output_index": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Keeps a small .ocs_index.jsonl file in the output folder (seed, path, counter, time per image) so the next counter comes from memory instead of listing the output folder on every save."
+                    }),
+                "output_mode": (["files", "tar_shards"], {
+                    "tooltip": "'tar_shards' appends the images to rolling uncompressed .tar shards in the target folder, with an ocs_shards.jsonl index of each image's shard and byte offset. FILE_PATH then names the member inside the shard folder."
+                    }),
+                "shard_size_mb": ("INT", {
+                    "default": 1024, "min": 1, "max": 1048576,
+                    "tooltip": "Size after which a new tar shard is started."
+                    }),
+                "deduplicate": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Hashes each image before encoding. If an identical image with the same format and metadata was already saved, it is hardlinked (or copied) instead of encoded again. Uses the output index; ignored with tar shards."
+                    }),
+                "profile_save": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Measures per-stage time (conversion, metadata, encoding, writes), bytes written and the process's peak memory for each batch. The report is logged as a JSON line and returned as SAVE_STATS."
+                    }),
+                "low_res_preview": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": f"Shows small ({_PREVIEW_SIZE}px WebP) temporary previews in the UI instead of the full-resolution files, which stay on disk unchanged. Also gives tar shard output a preview."
+                    }),
             },
             "hidden": {
                 "extra_pnginfo": "EXTRA_PNGINFO",
+                "prompt": "PROMPT",
             },
         }
 
-    RETURN_TYPES = ("STRING", "STRING")
-    RETURN_NAMES = ("FILENAME", "FILE_PATH")
+    RETURN_TYPES = ("STRING", "STRING", "STRING")
+    RETURN_NAMES = ("FILENAME", "FILE_PATH", "SAVE_STATS")
     FUNCTION = "save_images"
     OUTPUT_NODE = True
     CATEGORY = "OCS Nodes"
@@ -79,27 +379,40 @@ class OCS_ImageSaver:
         image_format: str = "png",
         lossless_webp: bool = True,
         jpg_webp_quality: int = 100,
+        frame_rate: float = 24.0,
+        loop_count: int = 0,
         date_format: str = "%Y-%m-%d",
         time_format: str = "%H%M%S",
         embed_workflow: bool = True,
+        embed_prompt: bool = False,
+        async_save: bool = False,
+        use_output_index: bool = False,
+        encoder_profile: str = "default",
+        output_mode: str = "files",
+        shard_size_mb: int = 1024,
+        deduplicate: bool = False,
+        low_res_preview: bool = False,
+        profile_save: bool = False,
         EXIF_UserComment: str = "",
         extra_pnginfo=None,
+        prompt=None,
     ):
-        (
-            full_output_folder,
-            filename_alt,
-            counter_alt,
-            subfolder_alt,
-            filename_prefix,
-        ) = folder_paths.get_save_image_path(
-            self.prefix_append,
-            self.output_dir,
-            images[0].shape[1],
-            images[0].shape[0],
-        )
-
-        output_folder = Path(full_output_folder)
-        counter_base = counter_alt
+        stats = _SaveStats(image_format, len(images), async_save) if profile_save else None
+        output_folder = Path(self.output_dir)
+
+        with _stage(stats, "quantize"):
+            frames = self._quantize_batch(images)
+        if image_format in _ANIMATED_FORMATS:
+            # The whole batch becomes the single item saved below.
+            frames = frames[None]
+
+        with _stage(stats, "counter"):
+            index = get_output_index(self.output_dir) if use_output_index or deduplicate else None
+            if index is not None:
+                # The directory scan only runs once, to seed an empty index.
+                counter_base = index.reserve(len(frames), lambda: self._scan_counter(images))
+            else:
+                counter_base = self._scan_counter(images)
 
         base_vars = {
             "%date": self._strftime(date_format),
@@ -109,8 +422,32 @@ class OCS_ImageSaver:
         }
 
         saved_filenames, saved_paths, ui_images = [], [], []
-
-        for (batch_number, image) in enumerate(images):
+        index_entries = []
+        shard_output = output_mode == "tar_shards"
+        shards_used = set()
+        dedup = deduplicate and not shard_output
+        batch_digests = {}
+        preview_token = uuid.uuid4().hex[:8]
+        futures = []
+
+        with _stage(stats, "metadata"):
+            save_kwargs = self._build_save_kwargs(
+                image_format,
+                embed_workflow,
+                embed_prompt,
+                EXIF_UserComment,
+                extra_pnginfo=extra_pnginfo,
+                prompt=prompt,
+            )
+            if image_format in _ANIMATED_FORMATS:
+                save_kwargs["duration"] = int(round(1000.0 / frame_rate))
+                save_kwargs["loop"] = loop_count
+            if dedup:
+                settings_key = self._settings_key(
+                    frames.shape[1:], image_format, lossless_webp, jpg_webp_quality, encoder_profile, save_kwargs
+                )
+
+        for (batch_number, frame) in enumerate(frames):
             var_map = base_vars.copy()
             var_map["%counter"] = f"{counter_base + batch_number:05}"
 
@@ -118,47 +455,152 @@ class OCS_ImageSaver:
             rel_filename = self._replace_tokens(filename, var_map)
 
             final_folder = output_folder / rel_folder
-            final_folder.mkdir(parents=True, exist_ok=True)
-
-            full_path = final_folder / f"{rel_filename}.{image_format}"
-
-            i = 255. * image.cpu().numpy()
-            img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
-
-            self.process_image(
-                img,
-                full_path,
-                image_format,
-                lossless_webp,
-                jpg_webp_quality,
-                embed_workflow,
-                EXIF_UserComment,
-                seed,
-                extra_pnginfo=extra_pnginfo,
-            )
+            with _stage(stats, "filesystem"):
+                if shard_output:
+                    shard = get_shard_writer(final_folder, shard_size_mb * 1024 * 1024)
+                    shards_used.add(shard)
+                elif index is not None:
+                    index.ensure_folder(final_folder)
+                else:
+                    final_folder.mkdir(parents=True, exist_ok=True)
+
+            extension = _ANIMATED_FORMATS.get(image_format, image_format)
+            full_path = final_folder / f"{rel_filename}.{extension}"
+            write_kwargs = {"stats": stats}
+            if shard_output:
+                write_kwargs["shard"] = shard
+                write_kwargs["record"] = {"seed": seed, "counter": counter_base + batch_number}
+
+            digest = None
+            linked = False
+            if dedup:
+                with _stage(stats, "hash"):
+                    digest = _pixel_digest(frame) + settings_key
+                source = batch_digests.setdefault(digest, full_path)
+                if source == full_path:
+                    existing = index.lookup_hash(digest)
+                    source = output_folder / existing["path"] if existing else None
+                with _stage(stats, "filesystem"):
+                    linked = source is not None and self._link_existing(source, full_path)
+                if linked and stats is not None:
+                    stats.linked += 1
+
+            if not linked:
+                save_args = (
+                    frame,
+                    full_path,
+                    image_format,
+                    lossless_webp,
+                    jpg_webp_quality,
+                    save_kwargs,
+                    encoder_profile,
+                )
+                if async_save:
+                    # ``frame`` is a read-only view into the batch buffer, which
+                    # stays alive until the last worker holding a view is done.
+                    written = _get_writer().submit(self._write_frame, *save_args, **write_kwargs)
+                    futures.append(written)
+                else:
+                    written = self._write_frame(*save_args, **write_kwargs)
+            else:
+                written = True
+
+            if index is not None:
+                entry = {"counter": counter_base + batch_number, "seed": seed, "path": str(full_path)}
+                if digest is not None:
+                    entry["hash"] = digest
+                index_entries.append((entry, written))
 
             saved_filenames.append(full_path.name)
             saved_paths.append(str(full_path))
-            ui_images.append(
-                {
-                    "filename": full_path.name,
-                    "subfolder": str(rel_folder),
-                    "type": self.type,
-                }
-            )
-
-            print(f"[OCS_ImageSaver] Saved: {full_path}")
+            # A file still queued for writing cannot be served to the UI yet,
+            # so pending async images are shown through a preview instead.
+            pending = async_save and not linked
+            if low_res_preview or (pending and not shard_output):
+                poster = frame[0] if image_format in _ANIMATED_FORMATS else frame
+                with _stage(stats, "preview"):
+                    ui_images.append(self._write_preview(poster, f"{full_path.stem}_{preview_token}"))
+            elif not shard_output:
+                ui_images.append(
+                    {
+                        "filename": full_path.name,
+                        "subfolder": str(rel_folder),
+                        "type": self.type,
+                    }
+                )
+
+        with _stage(stats, "filesystem"):
+            if index is not None:
+                # Only files that were actually written are indexed; in async
+                # mode that is known once the workers are done.
+                _when_done(futures, lambda: index.record(
+                    [entry for entry, written in index_entries if _succeeded(written)]
+                ))
+            # In async mode the shards are flushed once the batch's last
+            # worker is done, so their data and index lines reach the disk.
+            _when_done(futures, lambda: [shard.flush() for shard in shards_used])
+
+        stats_json = ""
+        if stats is not None:
+            # In async mode the log line follows once the workers are done;
+            # the returned report then lists the images still ``pending``.
+            if futures:
+                stats.track(futures)
+            stats_json = json.dumps(stats.report())
+            if not futures:
+                stats.finish()
 
         return {
             "ui": {"images": ui_images},
-            "result": (self._single_or_list(saved_filenames), self._single_or_list(saved_paths)),
+            "result": (
+                self._single_or_list(saved_filenames),
+                self._single_or_list(saved_paths),
+                stats_json,
+            ),
         }
 
     # -------------------- internals ------------------------
+    def _scan_counter(self, images) -> int:
+        """Next counter according to ComfyUI, which lists the output directory."""
+        (
+            full_output_folder,
+            filename_alt,
+            counter_alt,
+            subfolder_alt,
+            filename_prefix,
+        ) = folder_paths.get_save_image_path(
+            self.prefix_append,
+            self.output_dir,
+            images[0].shape[1],
+            images[0].shape[0],
+        )
+        return counter_alt
+
     @staticmethod
     def _single_or_list(lst):
         return lst[0] if len(lst) == 1 else lst
 
+    @staticmethod
+    def _quantize_batch(images) -> np.ndarray:
+        """Quantize the whole IMAGE batch to uint8 on its source device and
+        move it to the host in a single contiguous transfer.
+
+        The uint8 batch is allocated once and filled a few frames at a time,
+        so the float temporary of the scaling stays the size of one slab
+        instead of a second copy of the batch.
+
+        Returns a ``(B, H, W, C)`` uint8 array; indexing it yields zero-copy
+        per-image views suitable for ``Image.fromarray``.
+        """
+        batch = torch.empty(images.shape, dtype=torch.uint8, device=images.device)
+        frame_bytes = max(1, images[0].numel() * 4) if len(images) else 1
+        step = max(1, _QUANTIZE_SLAB_BYTES // frame_bytes)
+        with torch.no_grad():
+            for start in range(0, len(images), step):
+                slab = images[start:start + step].mul(255.0).clamp_(0, 255)
+                batch[start:start + step].copy_(slab)
+        return batch.cpu().numpy()
+
     @staticmethod
     def _replace_tokens(template: str, mapping: dict) -> str:
         for k, v in mapping.items():
@@ -166,55 +608,228 @@ class OCS_ImageSaver:
         return template.strip("/")
 
     @staticmethod
-    def process_image(
-        img: Image.Image,
-        path: Path,
+    def _write_preview(frame: np.ndarray, stem: str) -> dict:
+        """Write a small WebP preview of *frame* to the temp folder; return its UI entry."""
+        height, width = frame.shape[:2]
+        # Cheap strided subsample first so PIL only resamples a few pixels.
+        step = max(1, max(height, width) // (2 * _PREVIEW_SIZE))
+        img = Image.fromarray(np.ascontiguousarray(frame[::step, ::step]))
+        img.thumbnail((_PREVIEW_SIZE, _PREVIEW_SIZE), Image.BILINEAR)
+
+        folder = Path(folder_paths.get_temp_directory()) / _PREVIEW_SUBFOLDER
+        folder.mkdir(parents=True, exist_ok=True)
+        name = f"{stem}.webp"
+        img.save(folder / name, "WEBP", quality=80, method=0)
+        return {"filename": name, "subfolder": _PREVIEW_SUBFOLDER, "type": "temp"}
+
+    @staticmethod
+    def _settings_key(shape, image_format, lossless_webp, quality, encoder_profile, save_kwargs) -> str:
+        """Short digest of everything besides the pixels that shapes the file bytes."""
+        h = hashlib.blake2b(digest_size=8)
+        h.update(repr((
+            tuple(shape), image_format, lossless_webp, quality, encoder_profile,
+            save_kwargs.get("duration"), save_kwargs.get("loop"),
+        )).encode())
+        for chunk in getattr(save_kwargs.get("pnginfo"), "chunks", ()):
+            h.update(chunk[0])
+            h.update(chunk[1])
+        h.update(save_kwargs.get("exif") or b"")
+        return h.hexdigest()
+
+    @staticmethod
+    def _link_existing(source: Path, dest: Path) -> bool:
+        """Materialize *dest* from the identical, already saved *source*."""
+        try:
+            if not source.is_file():
+                # Deleted since it was indexed, or still queued for writing.
+                return False
+            if dest.exists():
+                if os.path.samefile(source, dest):
+                    return True
+                dest.unlink()
+            try:
+                os.link(source, dest)
+            except OSError:
+                # Cross-device or no hardlink support: a copy still skips encoding.
+                shutil.copyfile(source, dest)
+            print(f"[OCS_ImageSaver] Linked: {dest} -> {source}")
+            return True
+        except OSError as e:
+            print(f"[OCS_ImageSaver] Cannot link {dest} to {source}: {e}")
+            return False
+
+    @classmethod
+    def _write_frame(cls, frame: np.ndarray, path: Path, *args, shard=None, record=None, stats=None) -> bool:
+        """Encode *frame* to *path* (or into *shard*); returns whether it was written."""
+        try:
+            if shard is None and stats is None:
+                cls._write_file(path, lambda target: cls._encode_image(frame, target, *args))
+                print(f"[OCS_ImageSaver] Saved: {path}")
+                return True
+
+            # Encode in memory first: shards need the bytes, and profiling times
+            # encoding and the filesystem write separately.
+            buffer = io.BytesIO()
+            with _stage(stats, "encode"):
+                cls._encode_image(frame, buffer, *args)
+
+            with _stage(stats, "write"):
+                if shard is None:
+                    cls._write_file(path, lambda target: target.write_bytes(buffer.getbuffer()))
+                    print(f"[OCS_ImageSaver] Saved: {path}")
+                else:
+                    entry = shard.add(path.name, buffer.getvalue(), record)
+                    print(f"[OCS_ImageSaver] Saved: {path.name} -> {shard.folder / entry['shard']}")
+        except Exception as e:
+            print(f"Error saving image: {e}")
+            return False
+        if stats is not None:
+            stats.add_bytes(buffer.tell())
+        return True
+
+    @staticmethod
+    def _write_file(path: Path, write):
+        """Run ``write(target)`` on a partial file next to *path*, then move it into place.
+
+        *path* itself is never written through: with deduplication it may be
+        a hardlink shared with an earlier output. If the folder was deleted
+        since it was created, it is recreated and the write retried once.
+        """
+        partial = path.with_name(path.name + ".ocs_part")
+        try:
+            try:
+                write(partial)
+            except FileNotFoundError:
+                if path.parent.is_dir():
+                    raise
+                path.parent.mkdir(parents=True, exist_ok=True)
+                write(partial)
+            os.replace(partial, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(partial)
+            raise
+
+    @staticmethod
+    def _build_save_kwargs(
         image_format: str,
-        lossless_webp: bool,
-        quality: int,
         embed_workflow: bool,
+        embed_prompt: bool,
         EXIF_UserComment: str,
-        seed: int,
         extra_pnginfo=None,
-    ):
+        prompt=None,
+    ) -> dict:
+        """Encode the metadata shared by every image of a batch exactly once.
+
+        The returned kwargs are handed unchanged to ``_encode_image`` for each
+        image, so the workflow JSON and the EXIF block are never re-serialized
+        inside the per-image loop.
+        """
+        save_kwargs = {}
+
+        if image_format == "animated_webp":
+            # WebP has no text chunks; follow ComfyUI and store the workflow
+            # and prompt in the EXIF Make/Model tags, once per animation.
+            workflow_json = prompt_json = None
+            if embed_workflow and extra_pnginfo is not None:
+                workflow_json = json.dumps(extra_pnginfo["workflow"])
+            if embed_prompt and prompt is not None:
+                prompt_json = json.dumps(prompt)
+            try:
+                exif_bytes = _exif_block(EXIF_UserComment, workflow_json, prompt_json)
+                if exif_bytes is not None:
+                    save_kwargs["exif"] = exif_bytes
+            except Exception as e:
+                print(f"Error adding EXIF data: {e}")
+            return save_kwargs
+
+        if EXIF_UserComment:
+            try:
+                save_kwargs["exif"] = _exif_block(EXIF_UserComment)
+            except Exception as e:
+                print(f"Error adding EXIF data: {e}")
+
+        if image_format in ("png", "apng"):
+            pnginfo = PngImagePlugin.PngInfo()
+
+            if embed_prompt and prompt is not None:
+                pnginfo.add_text("prompt", json.dumps(prompt))
+
+            if embed_workflow and extra_pnginfo is not None:
+                workflow_json = json.dumps(extra_pnginfo["workflow"])
+                pnginfo.add_text("workflow", workflow_json)
+
+            save_kwargs["pnginfo"] = pnginfo
+
+        return save_kwargs
 
-        try:
-            exif_bytes = None
-
-            if EXIF_UserComment:
-                try:
-                    # Store user comment with UTF-16BE encoding per EXIF spec
-                    exif_payload = {
-                        "Exif": {
-                            piexif.ExifIFD.UserComment: b"UNICODE\0" + EXIF_UserComment.encode("utf-16be")
-                        }
-                    }
-                    exif_bytes = piexif.dump(exif_payload)
-                except Exception as e:
-                    print(f"Error adding EXIF data: {e}")
+    @staticmethod
+    def _encode_image(
+        frame: np.ndarray,
+        path,
+        image_format: str,
+        lossless_webp: bool,
+        quality: int,
+        save_kwargs: dict,
+        encoder_profile: str = "default",
+    ):
+        if image_format == "apng":
+            profile = encoder_profile if encoder_profile in PNG_PROFILES else "balanced"
+            write_apng(path, frame, profile, **save_kwargs)
+            return
+
+        if image_format == "animated_webp":
+            write_animated_webp(
+                path,
+                frame,
+                lossless=lossless_webp,
+                quality=quality,
+                method=_WEBP_METHODS.get(encoder_profile, 4),
+                **save_kwargs,
+            )
+            return
 
-            save_kwargs = {}
-            if exif_bytes is not None:
-                save_kwargs["exif"] = exif_bytes
+        if image_format == "png" and encoder_profile in PNG_PROFILES:
+            # Multi-threaded deflate straight from the uint8 buffer.
+            write_png(path, frame, encoder_profile, **save_kwargs)
+            return
 
-            if image_format == "png":
-                pnginfo = PngImagePlugin.PngInfo()
+        img = Image.fromarray(frame)
 
-                if embed_workflow and extra_pnginfo is not None:
-                    workflow_json = json.dumps(extra_pnginfo["workflow"])
-                    pnginfo.add_text("workflow", workflow_json)
+        if image_format == "png":
+            img.save(path, "PNG", **save_kwargs)
 
-                img.save(path, pnginfo=pnginfo, **save_kwargs)
+        elif image_format == "webp":
+            if encoder_profile in _WEBP_METHODS:
+                save_kwargs = dict(save_kwargs, method=_WEBP_METHODS[encoder_profile])
+            img.save(path, "WEBP", lossless=lossless_webp, quality=quality, **save_kwargs)
 
-            elif image_format == "webp":
-                img.save(path, "WEBP", lossless=lossless_webp, quality=quality, **save_kwargs)
+        elif image_format in {"jpg", "jpeg"}:
+            img.convert("RGB").save(path, "JPEG", quality=quality, **save_kwargs)
 
-            elif image_format in {"jpg", "jpeg"}:
-                img.convert("RGB").save(path, quality=quality, **save_kwargs)
 
-        except Exception as e:
-            print(f"Error saving image: {e}")
+@functools.lru_cache(maxsize=32)
+def _exif_block(comment: str, workflow_json: str = None, prompt_json: str = None):
+    """EXIF block carrying *comment* as UserComment, memoized across executions.
 
+    The optional workflow/prompt JSON go into the Make/Model tags the way
+    ComfyUI's own WebP saver stores them. Returns None when there is nothing
+    to store.
+    """
+    exif_payload = {}
+    if comment:
+        # Store user comment with UTF-16BE encoding per EXIF spec
+        exif_payload["Exif"] = {
+            piexif.ExifIFD.UserComment: b"UNICODE\0" + comment.encode("utf-16be")
+        }
+    zeroth = {}
+    if workflow_json is not None:
+        zeroth[piexif.ImageIFD.Make] = "workflow:" + workflow_json
+    if prompt_json is not None:
+        zeroth[piexif.ImageIFD.Model] = "prompt:" + prompt_json
+    if zeroth:
+        exif_payload["0th"] = zeroth
+    return piexif.dump(exif_payload) if exif_payload else None
 
 NODE_CLASS_MAPPINGS = {
     "OCS_ImageSaver": OCS_ImageSaver,
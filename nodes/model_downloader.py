@@ -1,8 +1,17 @@
+import contextlib
+import errno
+import hashlib
+import http.client
+import json
 import os
 import shutil
-from typing import Optional
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Dict, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 try:
     # ComfyUI provides this for pushing progress to the UI
@@ -17,6 +26,124 @@ except Exception:
     folder_paths = None  # type: ignore
     DEFAULT_MODELS_DIR = None
 
+from ._archive_stream import ARCHIVE_KINDS, CountingReader, detect_kind, extract_stream
+from ._blob_store import BlobStore, place
+
+# Connections kept alive per host, shared by every downloader node.
+POOL_MAXSIZE = int(os.getenv("OCS_DOWNLOADER_POOL_SIZE", "16"))
+# (connect, read) timeouts in seconds; a stalled transfer becomes a retryable error.
+REQUEST_TIMEOUT = (30, 60)
+RETRY_BACKOFF = 1.0
+# Minimum seconds between two progress lines / UI progress messages.
+PROGRESS_INTERVAL = 1.0
+_RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+# Per-folder record of downloaded files (size, mtime, sha256, validators).
+MANIFEST_NAME = ".ocs_models.json"
+_manifest_lock = threading.Lock()
+_HASH_BLOCK = 4 * 1024 * 1024
+# Size of the buffer every transfer reads the response body into.
+_BUFFER_SIZE = 1024 * 1024
+
+# Shared content-addressed store; defaults to <models_dir>/.ocs_blobs.
+BLOB_CACHE_DIR = os.getenv("OCS_MODEL_CACHE", "")
+
+# Target path -> event set when the download writing it finishes.
+_inflight: Dict[str, threading.Event] = {}
+_inflight_lock = threading.Lock()
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Module-level session, so TCP/TLS connections are reused across node executions.
+
+    urllib3 does not retry anything itself: connection errors and retryable
+    status codes are all retried by ``OCS_ModelDownloader._with_retries``
+    (and per range in segmented downloads), which honours ``max_retries``
+    and counts every attempt in the download stats.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+class DiskSpaceError(OSError):
+    """The target filesystem cannot hold the announced download."""
+
+
+def _format_bytes(count: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024:
+            return f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} TB"
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+
+@contextlib.contextmanager
+def claim_download(save_path: str):
+    """Hold the right to write *save_path*, waiting while another thread holds it.
+
+    Downloader nodes and background prefetch jobs share this registry, so a
+    node that needs a model which is still being prefetched waits for that
+    transfer instead of starting a second one.
+    """
+    key = os.path.realpath(save_path)
+    while True:
+        with _inflight_lock:
+            busy = _inflight.get(key)
+            if busy is None:
+                done = _inflight[key] = threading.Event()
+                break
+        print(f"[OCS_ModelDownloader] Waiting for the download already in progress: {save_path}")
+        busy.wait()
+    try:
+        yield
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        done.set()
+
+
+class TokenBucket:
+    """Byte-rate limiter shared by concurrent transfers.
+
+    ``consume`` may overdraw the bucket by one chunk; the debt is slept off
+    before returning, so callers can pass chunks of any size.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: int):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            # At most one second of burst is saved up while idle.
+            self._tokens = min(self.rate, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= amount
+            debt = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if debt:
+            time.sleep(debt)
+
 
 class OCS_ModelDownloader:
     """Downloads a file from a URL to any user-specified folder.
@@ -24,6 +151,20 @@ class OCS_ModelDownloader:
     - Accepts absolute or relative paths and creates the folder if missing.
     - Supports optional bearer token (or env var via $VARNAME) for private URLs.
     - Reports download progress to ComfyUI if available.
+    - Keeps interrupted downloads and resumes them with an HTTP Range request.
+    - Optionally fetches large files over several parallel byte-range connections.
+    - Reuses pooled keep-alive connections and retries transient failures with backoff.
+    - Verifies an optional SHA256 while downloading and records every file in a
+      per-folder manifest, so existing files are validated by size and mtime.
+    - Optionally keeps one copy of every model in a content-addressed cache and
+      links it into each requested folder instead of downloading it again.
+    - Optionally revalidates existing files with a conditional HEAD and replaces
+      them atomically when the server has a newer version.
+    - Checks free disk space up front, preallocates the file and streams the body
+      through one reusable buffer; optionally fsyncs before the final rename.
+    - Optionally extracts tar/zip archives into the folder while they download.
+    - Reports progress at most once per second with throughput and ETA, and
+      returns a JSON summary of the run (DOWNLOAD_STATS).
     """
 
     # -------------- UI schema --------------
@@ -65,14 +206,75 @@ class OCS_ModelDownloader:
                         "tooltip": "Optional bearer token. Use $VARNAME to pull from environment.",
                     },
                 ),
+                "resume": (
+                    "BOOLEAN",
+                    {
+                        "default": True,
+                        "tooltip": "Keep the partial .tmp file when a download fails and continue from where it stopped on the next run, if the file on the server is unchanged.",
+                    },
+                ),
+                "connections": (
+                    "INT",
+                    {
+                        "default": 1,
+                        "min": 1,
+                        "max": 16,
+                        "tooltip": "Parallel connections. Above 1, the file is split into byte ranges fetched concurrently (falls back to a single stream if the server does not support ranges).",
+                    },
+                ),
+                "max_retries": (
+                    "INT",
+                    {
+                        "default": 3,
+                        "min": 0,
+                        "max": 20,
+                        "tooltip": "How many times a download interrupted by a network error or a 5xx response is retried (with exponential backoff, resuming when possible).",
+                    },
+                ),
+                "sha256": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "multiline": False,
+                        "tooltip": "Optional expected SHA256. It is computed while the file is written; a mismatch discards the download, and an existing file that does not match is downloaded again.",
+                    },
+                ),
+                "use_blob_cache": (
+                    "BOOLEAN",
+                    {
+                        "default": False,
+                        "tooltip": "Keep every download in a shared content-addressed cache (OCS_MODEL_CACHE, or .ocs_blobs in the models folder) and materialize cached models as hardlinks/reflinks instead of downloading them again.",
+                    },
+                ),
+                "check_for_updates": (
+                    "BOOLEAN",
+                    {
+                        "default": False,
+                        "tooltip": "When the file already exists, ask the server (one conditional HEAD request) whether it changed since it was downloaded, and replace it if it did.",
+                    },
+                ),
+                "fsync": (
+                    "BOOLEAN",
+                    {
+                        "default": False,
+                        "tooltip": "Flush the finished file to disk before renaming it into place, so a crash or power loss never leaves a truncated model behind.",
+                    },
+                ),
+                "extract": (
+                    list(ARCHIVE_KINDS),
+                    {
+                        "default": "none",
+                        "tooltip": "Unpack a tar (.tar, .tar.gz, .tar.bz2, .tar.xz) or zip archive into the folder while it downloads, without storing the archive. 'auto' picks the type from the filename. FILE_PATH is then the folder.",
+                    },
+                ),
             },
             "hidden": {
                 "node_id": "UNIQUE_ID",
             },
         }
 
-    RETURN_TYPES = ("STRING",)
-    RETURN_NAMES = ("FILE_PATH",)
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("FILE_PATH", "DOWNLOAD_STATS")
     FUNCTION = "download"
     OUTPUT_NODE = True
     CATEGORY = "OCS Nodes"
@@ -80,6 +282,15 @@ class OCS_ModelDownloader:
     # -------------- core logic --------------
     def __init__(self):
         self.node_id = None
+        # Set by the prefetch scheduler: shared TokenBucket and a byte counter callback.
+        self.bandwidth: Optional[TokenBucket] = None
+        self.on_bytes = None
+        # Telemetry of the current run.
+        self._lock = threading.Lock()
+        self._started = 0.0
+        self._received = 0
+        self._retries = 0
+        self._last_report = (0.0, 0)
 
     def _send_progress(self, value: float, max_value: int = 100):
         if PromptServer is None or self.node_id is None:
@@ -91,12 +302,30 @@ class OCS_ModelDownloader:
         except Exception:
             pass
 
-    def download(self, url: str, folder: str, filename: str, node_id: str, token: str = ""):
+    def download(
+        self,
+        url: str,
+        folder: str,
+        filename: str,
+        node_id: str,
+        token: str = "",
+        resume: bool = True,
+        connections: int = 1,
+        max_retries: int = 3,
+        sha256: str = "",
+        use_blob_cache: bool = False,
+        check_for_updates: bool = False,
+        fsync: bool = False,
+        extract: str = "none",
+    ):
         self.node_id = node_id
+        self._started = time.monotonic()
+        self._received = self._retries = 0
+        expected_sha = (sha256 or "").strip().lower()
 
         if not url or not filename:
             print(f"[OCS_ModelDownloader] Missing required values: url='{url}', filename='{filename}'")
-            return ("",)
+            return self._result("", "failed")
 
         # Expand env vars (~, $VAR, %VAR% on Windows) and normalize path
         folder_expanded = os.path.expanduser(os.path.expandvars(folder or ""))
@@ -108,68 +337,811 @@ class OCS_ModelDownloader:
             os.makedirs(folder_expanded, exist_ok=True)
         except Exception as e:
             print(f"[OCS_ModelDownloader] Cannot create target folder '{folder_expanded}': {e}")
-            return ("",)
+            return self._result("", "failed")
 
         save_path = os.path.join(folder_expanded, filename)
-        if os.path.exists(save_path):
-            print(f"[OCS_ModelDownloader] File already exists: {save_path}")
-            return (save_path,)
+        with claim_download(save_path):
+            return self._download(
+                url, folder_expanded, filename, save_path, token, resume,
+                connections, max_retries, expected_sha, use_blob_cache, check_for_updates, fsync,
+                extract,
+            )
 
+    def _download(
+        self,
+        url: str,
+        folder_expanded: str,
+        filename: str,
+        save_path: str,
+        token: str,
+        resume: bool,
+        connections: int,
+        max_retries: int,
+        expected_sha: str,
+        use_blob_cache: bool,
+        check_for_updates: bool,
+        fsync: bool,
+        extract: str,
+    ):
         # Expand token from environment if it starts with '$'
         if token.startswith("$"):
             env_value = os.getenv(token[1:])
             token = env_value if env_value is not None else token
 
-        headers = {"Authorization": f"Bearer {token}"} if token else None
+        # Compressed bodies would break byte ranges, sizes and zero-copy reads.
+        headers = {"Accept-Encoding": "identity"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        if extract != "none":
+            return self._download_archive(url, headers, folder_expanded, filename, extract, max_retries, expected_sha)
+
+        if os.path.exists(save_path):
+            if not self._verify_existing(folder_expanded, filename, expected_sha):
+                print(f"[OCS_ModelDownloader] Existing file failed verification, downloading again: {save_path}")
+            elif check_for_updates and self._has_update(url, headers, folder_expanded, filename):
+                # The new version is fetched into the .tmp file and renamed over the old one.
+                print(f"[OCS_ModelDownloader] A newer version is available, downloading again: {save_path}")
+            else:
+                print(f"[OCS_ModelDownloader] File already exists: {save_path}")
+                return self._result(save_path, "existing")
+
+        store, url_key, etag = None, "", None
+        if use_blob_cache:
+            store = BlobStore(BLOB_CACHE_DIR or os.path.join(DEFAULT_MODELS_DIR or folder_expanded, ".ocs_blobs"))
+            if not expected_sha:
+                etag = self._probe_etag(url, headers)
+                url_key = BlobStore.url_key(url, etag) if etag else ""
+            if self._from_blob_cache(store, expected_sha, url_key, etag, folder_expanded, filename, url):
+                return self._result(save_path, "blob_cache")
 
         print(
             f"[OCS_ModelDownloader] Downloading {url} to {save_path}"
-            + (" with Authorization header" if headers else "")
+            + (" with Authorization header" if token else "")
         )
 
+        temp_path = save_path + ".tmp"
+        def fetch():
+            info = None
+            if connections > 1:
+                info = self._fetch_segmented(url, headers, temp_path, filename, resume, connections, max_retries)
+            if info is None:
+                info = self._fetch(url, headers, temp_path, filename, resume)
+            return info
+
         try:
-            with requests.get(url, headers=headers, stream=True) as response:
-                response.raise_for_status()
-                total_size = int(response.headers.get("content-length", 0))
-                temp_path = save_path + ".tmp"
-
-                downloaded = 0
-                last_report = 0.0
-
-                with open(temp_path, "wb") as file:
-                    for chunk in response.iter_content(chunk_size=4 * 1024 * 1024):
-                        if not chunk:
-                            continue
-                        size = file.write(chunk)
-                        downloaded += size
-
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100.0
-                            if progress - last_report >= 0.2:
-                                print(
-                                    f"[OCS_ModelDownloader] Downloading {filename}... {progress:.1f}%"
-                                )
-                                self._send_progress(progress, 100)
-                                last_report = progress
-
-                # Finalize
-                shutil.move(temp_path, save_path)
-                if total_size > 0:
-                    self._send_progress(100.0, 100)
-                print(f"[OCS_ModelDownloader] Complete! Saved to {save_path}")
-                return (save_path,)
+            info = self._with_retries(fetch, max_retries)
+
+            if (expected_sha or store is not None) and info["sha256"] is None:
+                # Segmented downloads arrive out of order: hash in one pass at the end.
+                info["sha256"] = self._hash_file(temp_path)
+            if expected_sha and info["sha256"] != expected_sha:
+                self._remove_quietly(temp_path)
+                self._remove_quietly(temp_path + ".json")
+                raise ValueError(f"SHA256 mismatch: expected {expected_sha}, got {info['sha256']}")
+
+            # Finalize
+            if fsync:
+                self._fsync(temp_path)
+            os.replace(temp_path, save_path)
+            if fsync:
+                self._fsync(folder_expanded)
+            self._remove_quietly(temp_path + ".json")
+            if store is not None:
+                if not url_key and info["etag"]:
+                    url_key = BlobStore.url_key(url, info["etag"])
+                try:
+                    method = store.add(save_path, info["sha256"], url_key)
+                    if method:
+                        print(f"[OCS_ModelDownloader] Linked with blob cache ({method}): {info['sha256']}")
+                except Exception as e:
+                    print(f"[OCS_ModelDownloader] Cannot add {filename} to the blob cache: {e}")
+            # After the blob cache, which may have swapped in a link to an existing blob.
+            self._record_manifest(folder_expanded, filename, url, info)
+            if info["size"] > 0:
+                self._send_progress(100.0, 100)
+            print(f"[OCS_ModelDownloader] Complete! Saved to {save_path}")
+            return self._result(save_path, "downloaded")
 
         except Exception as e:
-            # Clean up partial download
-            try:
-                temp_path = save_path + ".tmp"
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-            except Exception:
-                pass
+            if resume and os.path.exists(temp_path):
+                print(f"[OCS_ModelDownloader] Partial download kept for resume: {temp_path}")
+            else:
+                # Clean up partial download
+                self._remove_quietly(temp_path)
+                self._remove_quietly(temp_path + ".json")
             print(f"[OCS_ModelDownloader] Error: {e}")
-            return ("",)
+            return self._result("", "failed")
 
+    def _download_archive(
+        self, url: str, headers: dict, folder: str, filename: str, kind: str, max_retries: int, expected_sha: str
+    ):
+        """Download the archive *filename* and unpack it into *folder* on the fly.
+
+        The archive itself is never written to disk. Its manifest entry lists
+        the extracted files, so a later run skips the download while they all
+        still exist. A failed attempt is retried from the start, overwriting
+        the files extracted so far.
+        """
+        entry = self._load_manifest(folder).get(filename) or {}
+        extracted = entry.get("extracted")
+        if (
+            extracted
+            and all(os.path.exists(os.path.join(folder, name)) for name in extracted)
+            and (not expected_sha or entry.get("sha256") == expected_sha)
+        ):
+            print(f"[OCS_ModelDownloader] Archive already extracted: {filename}")
+            return self._result(folder, "existing")
+
+        try:
+            kind = detect_kind(filename, kind)
+            print(f"[OCS_ModelDownloader] Downloading and extracting {url} into {folder}")
+            info = self._with_retries(lambda: self._fetch_extract(url, headers, folder, filename, kind), max_retries)
+            if expected_sha and info["sha256"] != expected_sha:
+                for path in info["members"]:
+                    self._remove_quietly(path)
+                raise ValueError(f"SHA256 mismatch: expected {expected_sha}, got {info['sha256']}")
+        except Exception as e:
+            print(f"[OCS_ModelDownloader] Error: {e}")
+            return self._result("", "failed")
+
+        self._update_manifest(folder, filename, {
+            "url": url,
+            "size": info["size"],
+            "sha256": info["sha256"],
+            "etag": info["etag"],
+            "last_modified": info["last_modified"],
+            "extracted": [os.path.relpath(path, folder) for path in info["members"]],
+        })
+        self._send_progress(100.0, 100)
+        print(f"[OCS_ModelDownloader] Complete! Extracted {len(info['members'])} files into {folder}")
+        return self._result(folder, "extracted")
+
+    # -------------- helpers --------------
+    def _result(self, path: str, status: str):
+        """Node outputs: *path* and the JSON summary of this run."""
+        duration = time.monotonic() - self._started
+        rate = self._received / duration if duration > 0 else 0.0
+        stats = {
+            "status": status,
+            "file_path": path,
+            "size": os.path.getsize(path) if path and os.path.isfile(path) else None,
+            "bytes_received": self._received,
+            "duration_s": round(duration, 3),
+            "avg_throughput_mb_s": round(rate / 1024 ** 2, 2),
+            "retries": self._retries,
+        }
+        if self._received:
+            print(
+                f"[OCS_ModelDownloader] Received {_format_bytes(self._received)} in {duration:.1f}s "
+                f"({_format_bytes(rate)}/s, retries: {self._retries})"
+            )
+        return (path, json.dumps(stats))
+
+    def _with_retries(self, fetch, max_retries: int):
+        """Call *fetch* until it succeeds, retrying retryable errors with exponential backoff.
+
+        *max_retries* bounds the retries of the whole download: ranges of a
+        segmented download retried on their own count against it too.
+        """
+        attempt = 0
+        while True:
+            try:
+                return fetch()
+            except Exception as e:
+                if not self._take_retry(e, max_retries):
+                    raise
+                attempt += 1
+                delay = RETRY_BACKOFF * 2 ** (attempt - 1)
+                print(
+                    f"[OCS_ModelDownloader] {e} - retrying in {delay:.1f}s ({self._retries}/{max_retries})"
+                )
+                time.sleep(delay)
+
+    def _take_retry(self, error: Exception, max_retries: int) -> bool:
+        """Count a retry of *error* if it is retryable and the budget allows it."""
+        with self._lock:
+            if not self._is_retryable(error) or self._retries >= max_retries:
+                return False
+            self._retries += 1
+            return True
+
+    def _fetch_extract(self, url: str, headers: dict, folder: str, filename: str, kind: str) -> dict:
+        """Stream *url* through the *kind* extractor into *folder*, hashing it on the way."""
+        with _get_session().get(url, headers=headers or None, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            total_size = int(response.headers.get("content-length", 0))
+            if total_size > 0:
+                # The unpacked size is unknown; the archive size is a lower bound.
+                self._check_disk_space(os.path.join(folder, filename), total_size)
+
+            digest = hashlib.sha256()
+            downloaded = 0
+            self._start_progress(0)
+
+            def on_chunk(chunk):
+                nonlocal downloaded
+                digest.update(chunk)
+                downloaded += len(chunk)
+                self._account(len(chunk))
+                self._report_progress(filename, downloaded, total_size)
+
+            readinto = self._raw_readinto(response)
+            if readinto is None:
+                response.raw.decode_content = True
+                readinto = response.raw.readinto
+            stream = CountingReader(readinto, on_chunk)
+            try:
+                members = extract_stream(stream, folder, kind)
+                stream.drain()
+                self._release_connection(response)
+            except Exception as e:
+                if total_size > 0 and downloaded < total_size:
+                    # The archive looks corrupt only because the connection broke.
+                    raise IOError(f"Connection closed after {downloaded} of {total_size} bytes") from e
+                raise
+
+            if total_size > 0 and downloaded < total_size:
+                raise IOError(f"Connection closed after {downloaded} of {total_size} bytes")
+            return {
+                "size": downloaded,
+                "sha256": digest.hexdigest(),
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "members": members,
+            }
+
+    def _from_blob_cache(
+        self, store: BlobStore, sha256: str, url_key: str, etag: Optional[str],
+        folder: str, filename: str, url: str,
+    ) -> bool:
+        """Materialize *filename* from the blob cache; False on a cache miss."""
+        blob = store.lookup(sha256=sha256, url_key=url_key)
+        if blob is None:
+            return False
+        save_path = os.path.join(folder, filename)
+        try:
+            method = place(str(blob), save_path)
+        except Exception as e:
+            print(f"[OCS_ModelDownloader] Cannot use cached blob {blob}: {e}")
+            return False
+        self._record_manifest(folder, filename, url, {"sha256": blob.name, "etag": etag})
+        print(f"[OCS_ModelDownloader] Materialized {save_path} from the blob cache ({method})")
+        self._send_progress(100.0, 100)
+        return True
+
+    @classmethod
+    def _has_update(cls, url: str, headers: dict, folder: str, filename: str) -> bool:
+        """Whether the server copy of *url* differs from the existing *filename*.
+
+        Sends the ETag / Last-Modified recorded in the manifest as
+        ``If-None-Match`` / ``If-Modified-Since``; a ``304`` means unchanged.
+        Files recorded without validators are compared by size, and the
+        validators of the answer are stored for the next check. Network
+        errors keep the existing file.
+        """
+        entry = cls._load_manifest(folder).get(filename) or {}
+        conditional = dict(headers)
+        if entry.get("etag"):
+            conditional["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            conditional["If-Modified-Since"] = entry["last_modified"]
+        try:
+            response = _get_session().head(url, headers=conditional, allow_redirects=True, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 304:
+                return False
+            response.raise_for_status()
+        except Exception as e:
+            print(f"[OCS_ModelDownloader] Cannot check {url} for updates, keeping the existing file: {e}")
+            return False
+
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if entry.get("etag") or entry.get("last_modified"):
+            # Servers that ignore conditional headers still answer with validators.
+            if entry.get("etag"):
+                return etag != entry["etag"]
+            return last_modified != entry["last_modified"]
+
+        stat = os.stat(os.path.join(folder, filename))
+        content_length = response.headers.get("content-length")
+        if content_length is not None and int(content_length) != stat.st_size:
+            return True
+        cls._update_manifest(folder, filename, dict(
+            entry, url=url, size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+            sha256=entry.get("sha256"), etag=etag, last_modified=last_modified,
+        ))
+        return False
+
+    @staticmethod
+    def _probe_etag(url: str, headers: dict) -> Optional[str]:
+        """ETag of *url* after redirects, used to look a model up by URL."""
+        try:
+            response = _get_session().head(url, headers=headers, allow_redirects=True, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"[OCS_ModelDownloader] Cannot check {url} for the blob cache: {e}")
+            return None
+        return response.headers.get("etag")
+
+    def _fetch(self, url: str, headers: dict, temp_path: str, filename: str, resume: bool) -> dict:
+        """Stream *url* into *temp_path*, continuing a kept partial file when possible.
+
+        The validators of the first response (ETag / Last-Modified) are kept
+        next to the partial file in ``<temp_path>.json``; a later run sends
+        them as ``If-Range`` so the server only honours the ``Range`` when the
+        file is unchanged, and answers with the full body otherwise.
+
+        The SHA256 is updated chunk by chunk as the file is written; only the
+        kept prefix of a resumed download is read back once. Returns a dict
+        with ``size`` (0 when unknown), ``sha256``, ``etag`` and
+        ``last_modified``.
+        """
+        meta_path = temp_path + ".json"
+        offset = 0
+        request_headers = dict(headers)
+
+        meta = self._load_partial_meta(temp_path, url) if resume else None
+        if meta is not None and (meta.get("segments") or meta.get("preallocated")):
+            # Left by segmented mode or by a process that died mid-transfer:
+            # the file is preallocated, so its size says nothing about progress.
+            meta = None
+        if meta is not None:
+            validator = meta.get("etag")
+            if not validator or validator.startswith("W/"):
+                # Weak ETags are not allowed in If-Range.
+                validator = meta.get("last_modified")
+            offset = os.path.getsize(temp_path)
+            if offset > 0 and validator:
+                request_headers["Range"] = f"bytes={offset}-"
+                request_headers["If-Range"] = validator
+            else:
+                offset = 0
+
+        with _get_session().get(
+            url, headers=request_headers or None, stream=True, timeout=REQUEST_TIMEOUT
+        ) as response:
+            if offset and response.status_code == 416:
+                if meta.get("total_size") == offset:
+                    # The kept partial file is already complete.
+                    return {
+                        "size": offset,
+                        "sha256": self._hash_file(temp_path),
+                        "etag": meta.get("etag"),
+                        "last_modified": meta.get("last_modified"),
+                    }
+                print("[OCS_ModelDownloader] Server rejected the resume range, restarting.")
+                self._remove_quietly(temp_path)
+                self._remove_quietly(meta_path)
+                return self._fetch(url, headers, temp_path, filename, resume)
+            response.raise_for_status()
+
+            content_length = int(response.headers.get("content-length", 0))
+            digest = hashlib.sha256()
+            if offset and response.status_code == 206 and self._range_start(response) == offset:
+                print(f"[OCS_ModelDownloader] Resuming {filename} at {offset} bytes")
+                total_size = offset + content_length if content_length else 0
+                self._hash_file(temp_path, digest)
+            else:
+                if offset:
+                    print("[OCS_ModelDownloader] Server ignored the resume range or the file changed, restarting.")
+                offset = 0
+                total_size = content_length
+            if total_size > 0:
+                self._check_disk_space(temp_path, total_size - offset)
+
+            downloaded = offset
+            self._start_progress(offset)
+
+            def on_chunk(chunk):
+                nonlocal downloaded
+                digest.update(chunk)
+                downloaded += len(chunk)
+                self._account(len(chunk))
+                self._report_progress(filename, downloaded, total_size)
+
+            with open(temp_path, "r+b" if offset else "wb") as file:
+                if total_size > 0:
+                    if resume:
+                        # Until the file is trimmed back, its size is not the resume offset.
+                        self._save_partial_meta(meta_path, url, response, total_size, preallocated=True)
+                    self._preallocate(file, total_size)
+                elif resume:
+                    self._save_partial_meta(meta_path, url, response, total_size)
+                file.seek(offset)
+                try:
+                    self._stream_body(response, file, on_chunk)
+                finally:
+                    if total_size > 0 and downloaded < total_size:
+                        file.truncate(downloaded)
+                        if resume:
+                            self._save_partial_meta(meta_path, url, response, total_size)
+
+            if total_size > 0 and downloaded < total_size:
+                raise IOError(f"Connection closed after {downloaded} of {total_size} bytes")
+            return {
+                "size": downloaded,
+                "sha256": digest.hexdigest(),
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+            }
+
+    def _fetch_segmented(
+        self, url: str, headers: dict, temp_path: str, filename: str, resume: bool, connections: int,
+        max_retries: int,
+    ) -> Optional[dict]:
+        """Fetch *url* as *connections* concurrent byte ranges into a preallocated *temp_path*.
+
+        Each range is retried on its own from the last byte written, within
+        the download's *max_retries* budget. When the
+        download fails anyway, the position of every range is kept in
+        ``<temp_path>.json`` so a later run only fetches what is missing.
+        Returns the same dict as ``_fetch`` (with ``sha256`` left as None, the
+        ranges arrive out of order), or None when the server does not
+        announce a size or byte-range support, or rejects the HEAD request
+        as GET-only presigned URLs do (the caller then uses a single stream).
+        """
+        with _get_session().head(
+            url, headers=headers or None, allow_redirects=True, timeout=REQUEST_TIMEOUT
+        ) as head:
+            if not head.ok:
+                print(
+                    f"[OCS_ModelDownloader] HEAD request failed ({head.status_code} {head.reason}), "
+                    "using a single connection."
+                )
+                return None
+        total_size = int(head.headers.get("content-length", 0))
+        if total_size <= 0 or head.headers.get("accept-ranges", "").lower() != "bytes":
+            print("[OCS_ModelDownloader] Server does not support byte ranges, using a single connection.")
+            return None
+
+        meta_path = temp_path + ".json"
+        segments = None
+        meta = self._load_partial_meta(temp_path, url) if resume else None
+        if (
+            meta is not None
+            and meta.get("segments")
+            and meta.get("total_size") == total_size
+            and meta.get("etag") == head.headers.get("etag")
+            and meta.get("last_modified") == head.headers.get("last-modified")
+        ):
+            segments = meta["segments"]
+            print(f"[OCS_ModelDownloader] Resuming {filename} over {len(segments)} ranges")
+        if segments is None:
+            step = -(-total_size // connections)
+            segments = [
+                {"start": start, "end": min(start + step, total_size) - 1, "pos": start}
+                for start in range(0, total_size, step)
+            ]
+            self._check_disk_space(temp_path, total_size)
+            with open(temp_path, "wb") as fh:
+                self._preallocate(fh, total_size)
+
+        lock = threading.Lock()
+        downloaded = [sum(seg["pos"] - seg["start"] for seg in segments)]
+
+        def fetch_range(seg):
+            attempt = 0
+            while True:
+                try:
+                    range_headers = dict(headers)
+                    range_headers["Range"] = f"bytes={seg['pos']}-{seg['end']}"
+                    with _get_session().get(
+                        url, headers=range_headers, stream=True, timeout=REQUEST_TIMEOUT
+                    ) as response:
+                        response.raise_for_status()
+                        if response.status_code != 206 or self._range_start(response) != seg["pos"]:
+                            raise IOError("Server did not honour the byte range")
+                        def on_chunk(chunk):
+                            seg["pos"] += len(chunk)
+                            with lock:
+                                downloaded[0] += len(chunk)
+                            self._account(len(chunk))
+
+                        with open(temp_path, "r+b") as fh:
+                            fh.seek(seg["pos"])
+                            self._stream_body(response, fh, on_chunk)
+                    if seg["pos"] <= seg["end"]:
+                        raise IOError(f"Range ended early at byte {seg['pos']}")
+                    return
+                except Exception as e:
+                    if not self._take_retry(e, max_retries):
+                        raise
+                    print(f"[OCS_ModelDownloader] Range {seg['start']}-{seg['end']} failed ({e}), retrying")
+                    time.sleep(RETRY_BACKOFF * 2 ** attempt)
+                    attempt += 1
+
+        pending = [seg for seg in segments if seg["pos"] <= seg["end"]]
+        self._start_progress(downloaded[0])
+        with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="OCS_ModelDownloader") as pool:
+            futures = [pool.submit(fetch_range, seg) for seg in pending]
+            not_done = futures
+            while not_done:
+                done, not_done = wait(not_done, timeout=0.5, return_when=FIRST_EXCEPTION)
+                self._report_progress(filename, downloaded[0], total_size)
+                if any(f.exception() is not None for f in done):
+                    break
+            # Let the remaining ranges finish or fail so every position is final.
+            wait(futures)
+
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            if resume:
+                self._save_partial_meta(meta_path, url, head, total_size, segments)
+            raise errors[0]
+        return {
+            "size": total_size,
+            "sha256": None,
+            "etag": head.headers.get("etag"),
+            "last_modified": head.headers.get("last-modified"),
+        }
+
+    @staticmethod
+    def _stream_body(response, fh, on_chunk):
+        """Copy the body of *response* into *fh* through one reusable buffer.
+
+        Uncompressed bodies are read with ``readinto`` straight from the
+        underlying ``http.client`` response, so no ``bytes`` object is
+        allocated per chunk; *on_chunk* receives a memoryview into the buffer
+        that is only valid until it returns. Anything else goes through
+        ``iter_content``.
+        """
+        readinto = OCS_ModelDownloader._raw_readinto(response)
+        if readinto is None:
+            for chunk in response.iter_content(chunk_size=_BUFFER_SIZE):
+                if chunk:
+                    fh.write(chunk)
+                    on_chunk(chunk)
+            return
+
+        view = memoryview(bytearray(_BUFFER_SIZE))
+        try:
+            while True:
+                count = readinto(view)
+                if not count:
+                    break
+                chunk = view[:count]
+                fh.write(chunk)
+                on_chunk(chunk)
+        except http.client.HTTPException as e:
+            # e.g. IncompleteRead; surface it as a retryable I/O error.
+            raise IOError(f"Connection broken: {e!r}") from e
+        OCS_ModelDownloader._release_connection(response)
+
+    @staticmethod
+    def _raw_readinto(response):
+        """``readinto`` of the underlying http.client response, or None if the body is encoded."""
+        reader = getattr(response.raw, "_fp", None)
+        if (
+            not hasattr(reader, "readinto")
+            or response.headers.get("content-encoding", "identity").lower() != "identity"
+        ):
+            return None
+        return reader.readinto
+
+    @staticmethod
+    def _release_connection(response):
+        """Return the connection to the pool once the body has been read to the end.
+
+        A body read through ``_raw_readinto`` bypasses urllib3, which then
+        still considers it unread and would close the connection along with
+        the ``requests`` response instead of keeping it alive for reuse.
+        """
+        release = getattr(response.raw, "release_conn", None)
+        if release is not None:
+            release()
+
+    @staticmethod
+    def _check_disk_space(path: str, needed: int):
+        free = shutil.disk_usage(os.path.dirname(path) or ".").free
+        if needed > free:
+            raise DiskSpaceError(
+                errno.ENOSPC,
+                f"Not enough disk space: {needed / 1024 ** 3:.2f} GB needed, {free / 1024 ** 3:.2f} GB free",
+                os.path.dirname(path),
+            )
+
+    @staticmethod
+    def _preallocate(fh, size: int):
+        """Reserve *size* bytes for *fh*; falls back to a sparse file where blocks cannot be reserved."""
+        fh.flush()
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fh.fileno(), 0, size)
+                return
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    raise DiskSpaceError(errno.ENOSPC, "Not enough disk space to preallocate the download", fh.name)
+        fh.truncate(size)
+
+    @staticmethod
+    def _fsync(path: str):
+        """Flush *path* (a file, or a directory after a rename) to stable storage."""
+        try:
+            fd = os.open(path, os.O_RDONLY if os.path.isdir(path) else os.O_RDWR)
+        except OSError:
+            return  # Directories cannot be opened on Windows
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _account(self, size: int):
+        """Apply the shared bandwidth cap and byte counter, if any, to *size* new bytes."""
+        with self._lock:
+            self._received += size
+        if self.bandwidth is not None:
+            self.bandwidth.consume(size)
+        if self.on_bytes is not None:
+            self.on_bytes(size)
+
+    def _start_progress(self, downloaded: int):
+        self._last_report = (time.monotonic(), downloaded)
+
+    def _report_progress(self, filename: str, downloaded: int, total_size: int):
+        """Print/send progress at most every PROGRESS_INTERVAL seconds.
+
+        The rate is measured over the interval since the previous report, so
+        it follows throttling and stalls. Without a known size only the byte
+        count and rate are printed, and the UI progress bar is left alone.
+        """
+        now = time.monotonic()
+        last_time, last_bytes = self._last_report
+        if now - last_time < PROGRESS_INTERVAL:
+            return
+        self._last_report = (now, downloaded)
+        rate = (downloaded - last_bytes) / (now - last_time)
+
+        if total_size > 0:
+            progress = (downloaded / total_size) * 100.0
+            eta = _format_duration((total_size - downloaded) / rate) if rate > 0 else "--:--"
+            print(
+                f"[OCS_ModelDownloader] Downloading {filename}... {progress:.1f}% "
+                f"({_format_bytes(downloaded)} of {_format_bytes(total_size)}, {_format_bytes(rate)}/s, ETA {eta})"
+            )
+            self._send_progress(progress, 100)
+        else:
+            print(f"[OCS_ModelDownloader] Downloading {filename}... {_format_bytes(downloaded)} ({_format_bytes(rate)}/s)")
+
+    @staticmethod
+    def _hash_file(path: str, digest=None) -> str:
+        """Feed the contents of *path* into *digest* (a new SHA256 by default)."""
+        digest = digest if digest is not None else hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(_HASH_BLOCK), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _load_manifest(folder: str) -> dict:
+        try:
+            with open(os.path.join(folder, MANIFEST_NAME), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except Exception:
+            return {}
+
+    @classmethod
+    def _update_manifest(cls, folder: str, filename: str, entry: Optional[dict]):
+        """Set (or drop, when *entry* is None) the manifest entry of *filename*."""
+        with _manifest_lock:
+            manifest = cls._load_manifest(folder)
+            if entry is None:
+                manifest.pop(filename, None)
+            else:
+                manifest[filename] = entry
+            path = os.path.join(folder, MANIFEST_NAME)
+            try:
+                with open(path + ".tmp", "w", encoding="utf-8") as fh:
+                    json.dump(manifest, fh, indent=2)
+                os.replace(path + ".tmp", path)
+            except Exception as e:
+                print(f"[OCS_ModelDownloader] Cannot update manifest '{path}': {e}")
+
+    @classmethod
+    def _record_manifest(cls, folder: str, filename: str, url: str, info: dict):
+        stat = os.stat(os.path.join(folder, filename))
+        cls._update_manifest(folder, filename, {
+            "url": url,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": info.get("sha256"),
+            "etag": info.get("etag"),
+            "last_modified": info.get("last_modified"),
+        })
+
+    @classmethod
+    def _verify_existing(cls, folder: str, filename: str, expected_sha: str) -> bool:
+        """Cheap validity check of an existing file against the manifest.
+
+        A file whose size and mtime still match its manifest entry is trusted
+        without reading it; it is only rehashed when an expected SHA256 is set
+        and the entry cannot vouch for it. Files unknown to the manifest are
+        trusted as before unless an expected SHA256 is given.
+        """
+        path = os.path.join(folder, filename)
+        entry = cls._load_manifest(folder).get(filename)
+        stat = os.stat(path)
+        unchanged = (
+            entry is not None
+            and entry.get("size") == stat.st_size
+            and entry.get("mtime_ns") == stat.st_mtime_ns
+        )
+
+        if not expected_sha:
+            # Without an expected hash only a recorded size can be checked.
+            return entry is None or entry.get("size") == stat.st_size
+
+        if unchanged and entry.get("sha256") == expected_sha:
+            return True
+
+        print(f"[OCS_ModelDownloader] Verifying SHA256 of {path}")
+        actual = cls._hash_file(path)
+        if actual != expected_sha:
+            return False
+        entry = dict(entry or {}, size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=actual)
+        cls._update_manifest(folder, filename, entry)
+        return True
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Network hiccups and server-side errors are worth another try; 4xx are not."""
+        if isinstance(error, requests.HTTPError):
+            response = error.response
+            return response is not None and response.status_code in _RETRYABLE_STATUS
+        if isinstance(error, (requests.exceptions.InvalidURL, requests.exceptions.MissingSchema, requests.exceptions.InvalidSchema)):
+            return False
+        if isinstance(error, DiskSpaceError):
+            return False
+        # Covers connection resets, timeouts, truncated bodies and short reads.
+        return isinstance(error, IOError)
+
+    @staticmethod
+    def _range_start(response) -> int:
+        """First byte position of a ``Content-Range: bytes a-b/c`` header, or -1."""
+        value = response.headers.get("content-range", "")
+        try:
+            return int(value.split(" ", 1)[1].split("-", 1)[0])
+        except (IndexError, ValueError):
+            return -1
+
+    @staticmethod
+    def _load_partial_meta(temp_path: str, url: str) -> Optional[dict]:
+        if not os.path.exists(temp_path):
+            return None
+        try:
+            with open(temp_path + ".json", "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+        except Exception:
+            return None
+        return meta if meta.get("url") == url else None
+
+    @staticmethod
+    def _save_partial_meta(meta_path: str, url: str, response, total_size: int, segments=None, preallocated=False):
+        meta = {
+            "url": url,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "total_size": total_size,
+        }
+        if segments is not None:
+            meta["segments"] = segments
+        if preallocated:
+            meta["preallocated"] = True
+        try:
+            with open(meta_path, "w", encoding="utf-8") as fh:
+                json.dump(meta, fh)
+        except Exception as e:
+            print(f"[OCS_ModelDownloader] Cannot write resume info '{meta_path}': {e}")
+
+    @staticmethod
+    def _remove_quietly(path: str):
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception:
+            pass
 
 NODE_CLASS_MAPPINGS = {
     "OCS_ModelDownloader": OCS_ModelDownloader,
@@ -0,0 +1,265 @@
+"""Node that downloads a whole list of models in the background.
+
+Entries run through the Model Downloader with bounded concurrency, highest
+priority first, under one bandwidth cap shared by every prefetch job. A
+Model Downloader node that asks for a file still being prefetched waits for
+that transfer instead of starting its own.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List
+from urllib.parse import unquote, urlparse
+
+from .model_downloader import DEFAULT_MODELS_DIR, OCS_ModelDownloader, PromptServer, TokenBucket
+
+# Global cap for all prefetch jobs; its rate follows the most recent run.
+_bandwidth = TokenBucket(0)
+_REPORT_INTERVAL = 2.0
+
+
+def parse_manifest(text: str, default_folder: str) -> List[dict]:
+    """Parse a JSON array (or ``{"models": [...]}``) or one entry per line.
+
+    A line is either a JSON object or ``url | folder | filename | sha256 |
+    priority`` with everything after the URL optional. Blank lines and lines
+    starting with ``#`` are ignored.
+    """
+    text = (text or "").strip()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, list):
+        raw = data
+    elif isinstance(data, dict):
+        raw = data.get("models", [data])
+    else:
+        raw = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                raw.append(json.loads(line))
+                continue
+            fields = [field.strip() for field in line.split("|")]
+            fields += [""] * (5 - len(fields))
+            raw.append(dict(zip(("url", "folder", "filename", "sha256", "priority"), fields)))
+
+    entries = []
+    for item in raw:
+        url = (item.get("url") or "").strip()
+        if not url:
+            print(f"[OCS_ModelPrefetch] Skipping manifest entry without url: {item}")
+            continue
+        entries.append({
+            "url": url,
+            "folder": item.get("folder") or default_folder,
+            "filename": item.get("filename") or os.path.basename(unquote(urlparse(url).path)),
+            "sha256": item.get("sha256") or "",
+            "priority": int(item.get("priority") or 0),
+        })
+    # Stable sort: equal priorities keep their manifest order.
+    entries.sort(key=lambda entry: -entry["priority"])
+    return entries
+
+
+class _PrefetchJob:
+
+    def __init__(self, entries: List[dict], max_concurrent: int, token: str, use_blob_cache: bool, node_id):
+        self.entries = entries
+        self.max_concurrent = max_concurrent
+        self.token = token
+        self.use_blob_cache = use_blob_cache
+        self.node_id = node_id
+        self.done = 0
+        self.failed: List[str] = []
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def run(self):
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="OCS_ModelPrefetch") as pool:
+            # Submission order is execution order, so higher priorities start first.
+            pending = [pool.submit(self._fetch_one, entry) for entry in self.entries]
+            while pending:
+                _, pending = wait(pending, timeout=_REPORT_INTERVAL)
+                self._report(started)
+
+        summary = f"{self.done - len(self.failed)}/{len(self.entries)} models ready"
+        if self.failed:
+            summary += f", failed: {', '.join(self.failed)}"
+        print(f"[OCS_ModelPrefetch] Finished in {time.monotonic() - started:.1f}s: {summary}")
+
+    def _fetch_one(self, entry: dict) -> str:
+        downloader = OCS_ModelDownloader()
+        downloader.bandwidth = _bandwidth
+        downloader.on_bytes = self._count
+        try:
+            path = downloader.download(
+                entry["url"], entry["folder"], entry["filename"], None,
+                token=self.token, sha256=entry["sha256"], use_blob_cache=self.use_blob_cache,
+            )[0]
+        except Exception as e:
+            print(f"[OCS_ModelPrefetch] {entry['filename']}: {e}")
+            path = ""
+        with self._lock:
+            self.done += 1
+            if not path:
+                self.failed.append(entry["filename"])
+        return path
+
+    def _count(self, size: int):
+        with self._lock:
+            self.bytes += size
+
+    def _report(self, started: float):
+        with self._lock:
+            done, received = self.done, self.bytes
+        elapsed = max(time.monotonic() - started, 1e-6)
+        print(
+            f"[OCS_ModelPrefetch] {done}/{len(self.entries)} models, "
+            f"{received / 1024 ** 2:.1f} MB received, {received / 1024 ** 2 / elapsed:.1f} MB/s"
+        )
+        if PromptServer is not None and self.node_id is not None:
+            try:
+                PromptServer.instance.send_sync(
+                    "progress", {"node": self.node_id, "value": done, "max": len(self.entries)}
+                )
+            except Exception:
+                pass
+
+
+class OCS_ModelPrefetch:
+    """
+    Downloads every model of a manifest in the background.
+
+    - Bounded number of concurrent downloads, highest priority first.
+    - One bandwidth cap shared by all prefetch jobs.
+    - Aggregated progress (models done, bytes received, throughput).
+    - Model Downloader nodes wait for files that are still being prefetched.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        default_folder = DEFAULT_MODELS_DIR or os.getcwd()
+        return {
+            "required": {
+                "manifest": (
+                    "STRING",
+                    {
+                        "multiline": True,
+                        "default": "",
+                        "tooltip": "JSON array of {url, folder, filename, sha256, priority}, or one entry per line as JSON or 'url | folder | filename | sha256 | priority'. Only url is required.",
+                    },
+                ),
+                "folder": (
+                    "STRING",
+                    {
+                        "multiline": False,
+                        "default": default_folder,
+                        "tooltip": "Folder for entries that do not set their own.",
+                    },
+                ),
+                "max_concurrent": (
+                    "INT",
+                    {
+                        "default": 2,
+                        "min": 1,
+                        "max": 16,
+                        "tooltip": "How many models are downloaded at the same time.",
+                    },
+                ),
+                "bandwidth_limit_mb": (
+                    "FLOAT",
+                    {
+                        "default": 0.0,
+                        "min": 0.0,
+                        "max": 10000.0,
+                        "step": 1.0,
+                        "tooltip": "Total download rate in MB/s shared by all prefetch jobs. 0 = unlimited.",
+                    },
+                ),
+                "wait_for_completion": (
+                    "BOOLEAN",
+                    {
+                        "default": False,
+                        "tooltip": "Block the workflow until every model is downloaded. Off: downloads continue in the background.",
+                    },
+                ),
+            },
+            "optional": {
+                "token": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "multiline": False,
+                        "password": True,
+                        "tooltip": "Optional bearer token. Use $VARNAME to pull from environment.",
+                    },
+                ),
+                "use_blob_cache": (
+                    "BOOLEAN",
+                    {
+                        "default": False,
+                        "tooltip": "Use the Model Downloader's shared blob cache for every entry.",
+                    },
+                ),
+            },
+            "hidden": {
+                "node_id": "UNIQUE_ID",
+            },
+        }
+
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("FILE_PATHS",)
+    FUNCTION = "prefetch"
+    OUTPUT_NODE = True
+    CATEGORY = "OCS Nodes"
+
+    def prefetch(
+        self,
+        manifest: str,
+        folder: str,
+        max_concurrent: int,
+        bandwidth_limit_mb: float,
+        wait_for_completion: bool,
+        node_id=None,
+        token: str = "",
+        use_blob_cache: bool = False,
+    ):
+        try:
+            entries = parse_manifest(manifest, folder)
+        except Exception as e:
+            print(f"[OCS_ModelPrefetch] Invalid manifest: {e}")
+            return ("",)
+        if not entries:
+            print("[OCS_ModelPrefetch] The manifest lists no models")
+            return ("",)
+
+        _bandwidth.rate = bandwidth_limit_mb * 1024 * 1024
+        job = _PrefetchJob(entries, max_concurrent, token, use_blob_cache, node_id)
+        print(f"[OCS_ModelPrefetch] Prefetching {len(entries)} models with {max_concurrent} connections")
+        if wait_for_completion:
+            job.run()
+        else:
+            threading.Thread(target=job.run, name="OCS_ModelPrefetch", daemon=True).start()
+
+        paths = [
+            os.path.join(os.path.abspath(os.path.expanduser(os.path.expandvars(entry["folder"]))), entry["filename"])
+            for entry in entries
+        ]
+        return ("\n".join(paths),)
+
+
+NODE_CLASS_MAPPINGS = {
+    "OCS_ModelPrefetch": OCS_ModelPrefetch,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "OCS_ModelPrefetch": "Model Prefetch",
+}
@@ -1,7 +1,59 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import torch
+import torch.nn.functional as F
 from PIL import Image
 
+BACKENDS = ["pil", "torch"]
+# ITU-R 601-2 luma, as used by PIL for RGB -> L.
+_LUMA = (0.299, 0.587, 0.114)
+# Memory budget of the resized-watermark cache, shared by all nodes.
+CACHE_BUDGET_BYTES = int(os.getenv("OCS_WATERMARK_CACHE_MB", "256")) * 1024 * 1024
+
+
+class _PreparedCache:
+    """LRU cache of resized watermarks, bounded by the total size of its entries."""
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, nbytes: int):
+        if nbytes > self.budget:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.budget:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+
+_prepared = _PreparedCache(CACHE_BUDGET_BYTES)
+
+
+def _digest(tensor) -> str:
+    """Content hash of a watermark tensor (values and shape)."""
+    data = tensor.detach().to("cpu", torch.float32).contiguous().numpy()
+    return f"{hashlib.blake2b(data, digest_size=16).hexdigest()}{tuple(data.shape)}"
+
 
 class OCS_Watermarker:
 
@@ -16,7 +68,41 @@ class OCS_Watermarker:
                     {"default": 20.0, "min": 0.0, "max": 100.0, "step": 0.1},
                 ),
                 "padding": ("INT", {"default": 25, "min": 0, "max": 8192}),
-            }
+            },
+            "optional": {
+                "backend": (
+                    BACKENDS,
+                    {
+                        "default": "pil",
+                        "tooltip": "pil: per-frame Lanczos resize and paste. torch: resize the watermark once and blend the whole batch in one tensor operation on the image's device. Uses bicubic instead of Lanczos, so hard watermark edges can differ slightly from pil.",
+                    },
+                ),
+                "in_place": (
+                    "BOOLEAN",
+                    {
+                        "default": False,
+                        "tooltip": "Write the watermark directly into the source image tensor instead of a copy. Saves a full copy of the batch, but changes the source image for every other node using it.",
+                    },
+                ),
+                "chunk_size": (
+                    "INT",
+                    {
+                        "default": 0,
+                        "min": 0,
+                        "max": 4096,
+                        "tooltip": "Frames processed per slab, written straight into the output batch. Bounds the temporary memory of long sequences. 0 = whole batch at once.",
+                    },
+                ),
+                "workers": (
+                    "INT",
+                    {
+                        "default": 1,
+                        "min": 1,
+                        "max": 64,
+                        "tooltip": "Threads processing slabs in parallel (with chunk_size > 0).",
+                    },
+                ),
+            },
         }
 
     RETURN_TYPES = ("IMAGE",)
@@ -29,10 +115,18 @@ class OCS_Watermarker:
                         source_image,
                         watermark,
                         scale_percent,
-                        padding):
+                        padding,
+                        backend="pil",
+                        in_place=False,
+                        chunk_size=0,
+                        workers=1):
 
         padding = self._extract_scalar(padding, int)
         scale_percent = self._extract_scalar(scale_percent, float)
+        backend = self._extract_scalar(backend, str)
+        in_place = self._extract_scalar(in_place, bool)
+        chunk_size = self._extract_scalar(chunk_size, int)
+        workers = self._extract_scalar(workers, int)
 
         src_tensor = self._ensure_tensor(source_image)
         wm_tensor = self._ensure_tensor(watermark)
@@ -40,56 +134,171 @@ class OCS_Watermarker:
         batch_size = src_tensor.shape[0]
         wm_count = wm_tensor.shape[0]
 
-        result = []
+        if backend == "torch":
+            stamp = self._torch_stamper(src_tensor, wm_tensor, scale_percent, padding)
+        else:
+            # Hashed once per call; the resized watermarks themselves are cached across calls.
+            wm_keys = [_digest(wm_tensor[i]) for i in range(wm_count)]
 
-        for idx in range(batch_size):
-            src_img = src_tensor[idx]
-            wm_img = wm_tensor[idx % wm_count]
+            def stamp(frames, start):
+                for offset in range(frames.shape[0]):
+                    idx = start + offset
+                    wm_img = wm_tensor[idx % wm_count]
+                    self._overlay_watermark(frames[offset], wm_img, scale_percent, padding, wm_keys[idx % wm_count])
 
-            watermarked = self._overlay_watermark(src_img, wm_img, scale_percent, padding)
-            result.append(watermarked)
+        # One output batch, filled slab by slab: extra memory is bounded by a slab.
+        result = src_tensor if in_place else torch.empty_like(src_tensor)
+        chunk = chunk_size if chunk_size > 0 else max(1, batch_size)
 
-        stacked = torch.stack(result, dim=0)
-        stacked = stacked.to(device=src_tensor.device)
-        return (stacked,)
+        def process(start):
+            frames = result[start:start + chunk]
+            if result is not src_tensor:
+                frames.copy_(src_tensor[start:start + chunk])
+            stamp(frames, start)
+
+        starts = range(0, batch_size, chunk)
+        if workers > 1 and len(starts) > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="OCS_Watermarker") as pool:
+                list(pool.map(process, starts))
+        else:
+            for start in starts:
+                process(start)
+
+        return (result,)
 
     # ──────────────────────────────────────────────────────────────────────────
-    def _overlay_watermark(self, src_img_tensor, wm_tensor, scale_percent, padding):
-        src_pil = self._tensor_to_pil(src_img_tensor)
-        src_rgba = src_pil.convert("RGBA")
+    def _overlay_watermark(self, frame, wm_tensor, scale_percent, padding, wm_key=None):
+        """Stamp *wm_tensor* onto the ``[H, W, C]`` *frame* tensor, in place.
 
-        wm_pil = self._tensor_to_pil(wm_tensor).convert("RGBA")
+        Only the region under the watermark goes through PIL; the rest of
+        the frame is never copied or converted.
+        """
+        height, width = frame.shape[0], frame.shape[1]
+        placement = self._placement(width, height, wm_tensor.shape[1], wm_tensor.shape[0],
+                                    scale_percent, padding)
+        if placement is None:
+            return
+        new_w, new_h, x, y = placement
 
-        if scale_percent <= 0.0 or wm_pil.width == 0 or wm_pil.height == 0:
-            composite = src_rgba
-        else:
-            scale_ratio = max(scale_percent / 100.0, 0.0)
+        resized = self._prepared_pil(wm_tensor, wm_key or _digest(wm_tensor), new_w, new_h)
+
+        roi = frame[y:y + new_h, x:x + new_w]
+        roi_pil = self._tensor_to_pil(roi)
+        composite = roi_pil.convert("RGBA")
+        if composite.size != resized.size:
+            # Bounds crop: the watermark may not fit when the placement is clamped.
+            resized = resized.crop((0, 0, composite.width, composite.height))
+
+        alpha = resized.getchannel("A")
+        composite.paste(resized, (0, 0), alpha)
+
+        final_img = composite.convert(roi_pil.mode)
+        roi.copy_(self._pil_to_tensor(final_img, frame.dtype))
+
+    # ──────────────────────────────────────────────────────────────────────────
+    def _torch_stamper(self, src, wm, scale_percent, padding):
+        """Return ``stamp(frames, start)`` blending the watermark into a ``[N, H, W, C]`` slab in place.
 
-            target_w = max(1, int(round(src_rgba.width * scale_ratio)))
-            target_h = max(1, int(round(src_rgba.height * scale_ratio)))
+        Follows ``_overlay_watermark``: the watermark is resized once per
+        watermark frame (and cached, see ``_prepared_torch``), frame ``i`` of
+        the batch gets watermark ``i % wm_count``, and every channel of the
+        destination, alpha included, is mixed with the watermark alpha as
+        PIL's ``paste`` does. Each slab is blended with one tensor operation.
+        """
+        _, height, width, channels = src.shape
+        placement = self._placement(width, height, wm.shape[2], wm.shape[1], scale_percent, padding)
+        if placement is None:
+            return lambda frames, start: None
+        new_w, new_h, x, y = placement
 
-            width_ratio = target_w / wm_pil.width
-            height_ratio = target_h / wm_pil.height
-            resize_ratio = min(width_ratio, height_ratio)
+        prepared = self._prepared_torch(wm, new_w, new_h, src.device, src.dtype)
+        alpha = prepared[..., 3:]
+        color = prepared[..., :3]  # premultiplied
+        if channels in (1, 2):
+            luma = torch.tensor(_LUMA, device=src.device, dtype=src.dtype)
+            color = (color * luma).sum(dim=-1, keepdim=True)
+        if channels in (2, 4):
+            color = torch.cat((color, alpha * alpha), dim=-1)
+        # Bounds crop: the watermark may not fit when the placement is clamped.
+        crop_h, crop_w = min(new_h, height - y), min(new_w, width - x)
+        inverse = 1 - alpha[:, :crop_h, :crop_w]
+        color = color[:, :crop_h, :crop_w, :channels]
+        wm_count = prepared.shape[0]
 
-            # Guarantee at least one pixel for extremely small percentages.
-            new_w = max(1, int(round(wm_pil.width * resize_ratio)))
-            new_h = max(1, int(round(wm_pil.height * resize_ratio)))
+        def stamp(frames, start):
+            slab_inverse, slab_color = inverse, color
+            if wm_count > 1:
+                index = torch.arange(start, start + frames.shape[0], device=src.device) % wm_count
+                slab_inverse, slab_color = inverse[index], color[index]
+            roi = frames[:, y:y + crop_h, x:x + crop_w, :]
+            roi.mul_(slab_inverse).add_(slab_color)
 
+        return stamp
+
+    # ──────────────────────────────────────────────────────────────────────────
+    def _prepared_pil(self, wm_tensor, wm_key, new_w, new_h):
+        """Straight-alpha RGBA watermark resized with Lanczos, as ``paste`` expects it."""
+        key = ("pil", wm_key, new_w, new_h, "lanczos")
+        resized = _prepared.get(key)
+        if resized is None:
+            wm_pil = self._tensor_to_pil(wm_tensor).convert("RGBA")
             resized = wm_pil.resize((new_w, new_h), Image.LANCZOS)
+            _prepared.put(key, resized, new_w * new_h * 4)
+        return resized
+
+    def _prepared_torch(self, wm, new_w, new_h, device, dtype):
+        """``[N, h, w, 4]`` premultiplied RGBA watermarks resized with bicubic filtering.
+
+        Resizing happens in premultiplied alpha, like PIL's RGBA resize, and
+        the colour is clamped to the alpha so every entry is a valid
+        premultiplied pixel.
+        """
+        key = ("torch", _digest(wm), new_w, new_h, "bicubic", str(device), dtype)
+        prepared = _prepared.get(key)
+        if prepared is None:
+            wm = self._to_rgba(wm.to(device=device, dtype=dtype).clamp(0, 1))
+            alpha = wm[..., 3:]
+            premultiplied = torch.cat((wm[..., :3] * alpha, alpha), dim=-1)
+            resized = F.interpolate(
+                premultiplied.permute(0, 3, 1, 2), size=(new_h, new_w),
+                mode="bicubic", antialias=True, align_corners=False,
+            ).permute(0, 2, 3, 1).clamp(0, 1)
+            alpha = resized[..., 3:]
+            prepared = torch.cat((torch.minimum(resized[..., :3], alpha), alpha), dim=-1).contiguous()
+            _prepared.put(key, prepared, prepared.numel() * prepared.element_size())
+        return prepared
 
-            composite = src_rgba.copy()
+    @staticmethod
+    def _placement(src_w, src_h, wm_w, wm_h, scale_percent, padding):
+        """Watermark size and top-left corner ``(new_w, new_h, x, y)``, or None for no watermark."""
+        if scale_percent <= 0.0 or wm_w == 0 or wm_h == 0:
+            return None
+        scale_ratio = max(scale_percent / 100.0, 0.0)
+
+        target_w = max(1, int(round(src_w * scale_ratio)))
+        target_h = max(1, int(round(src_h * scale_ratio)))
 
-            x = max(0, src_rgba.width - new_w - padding)
-            y = max(0, src_rgba.height - new_h - padding)
+        width_ratio = target_w / wm_w
+        height_ratio = target_h / wm_h
+        resize_ratio = min(width_ratio, height_ratio)
 
-            alpha = resized.getchannel("A")
-            composite.paste(resized, (x, y), alpha)
+        # Guarantee at least one pixel for extremely small percentages.
+        new_w = max(1, int(round(wm_w * resize_ratio)))
+        new_h = max(1, int(round(wm_h * resize_ratio)))
 
-        target_mode = src_pil.mode
-        final_img = composite.convert(target_mode)
+        x = max(0, src_w - new_w - padding)
+        y = max(0, src_h - new_h - padding)
+        return new_w, new_h, x, y
 
-        return self._pil_to_tensor(final_img, src_img_tensor.dtype)
+    @staticmethod
+    def _to_rgba(img):
+        """``[B, H, W, C]`` with 1 (L), 2 (LA), 3 (RGB) or 4 (RGBA) channels -> RGBA."""
+        channels = img.shape[-1]
+        if channels in (1, 2):
+            img = torch.cat((img[..., :1].expand(*img.shape[:-1], 3), img[..., 1:]), dim=-1)
+        if img.shape[-1] == 3:
+            img = torch.cat((img, torch.ones_like(img[..., :1])), dim=-1)
+        return img
 
     # ──────────────────────────────────────────────────────────────────────────
     @staticmethod